@@ -0,0 +1,38 @@
+"""
+The quantum data encodings.
+
+The encoding functions are imported from their modules on first access, e.g.
+`from Encodings import AmplitudeEncoding` only imports `Encodings.qs_AmplitudeEncoding`.
+"""
+import importlib
+
+# Typing stuff
+from typing import Any
+
+
+# The module of each encoding function
+encoding_modules : dict[str, str] = {
+    "AmplitudeEncoding":        "qs_AmplitudeEncoding",
+    "AmplitudeQRAM":            "qs_AmpQRAM",
+    "AngleEncoding":            "qs_AngleEncoding",
+    "BasisEncoding":            "qs_BasisEncoding",
+    "FRQIEncoding":             "qs_FRQI",
+    "SparseAmplitudeEncoding":  "qs_SparseAmplitudeEncoding",
+}
+
+__all__ = list(encoding_modules)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in encoding_modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f"{__name__}.{encoding_modules[name]}"), name)
+
+    # Later accesses do not go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -1,27 +1,17 @@
-
-
-
-
-# Add the parent directory of the current script's directory to the Python path
-import sys
-import os
-
-
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))  # Get the directory of the current script
-sys.path.append(os.path.dirname(SCRIPT_DIR))  # Add the parent directory to the Python path
-
-
 # Import Local modules
 from Utilities.utils import pad_with_zeros
+from Utilities.pruning import record_pruning
 
 
 import numpy as np
 from qiskit import QuantumCircuit , QuantumRegister
+from qiskit.circuit import ParameterVector
 
 
 from typing import Any, Union, Optional
 
-from Encodings.qs_AmplitudeEncoding import circuit_maker_amplitude_encoding, solve_spherical_angles, AmplitudeEncoding
+from Encodings.qs_AmplitudeEncoding import circuit_maker_amplitude_encoding, solve_spherical_angles, AmplitudeEncoding, AmplitudeEncoding_statevector, \
+                                         AmplitudeEncoding_angles, AmplitudeEncoding_template
 
 
 def AmplitudeQRAM(data : Union[list, np.ndarray] , number_of_address_qubits : int = 0 ) -> QuantumCircuit:
@@ -104,29 +94,151 @@ def AmplitudeQRAM(data : Union[list, np.ndarray] , number_of_address_qubits : in
     # Create a superposition for all the addresses
     qc.h(range(number_of_address_qubits))
 
+    # The gates pruned during the construction are reported in qc.metadata
+    record_pruning(qc)
+
+    # Find the angles "alpha" of all the addresses at once (addresses without data are left in |0>, so all of their gates are pruned)
+    alphas = AmplitudeQRAM_angles(padded_data, number_of_address_qubits)
 
     for i in range(2**number_of_address_qubits) : 
 
         qc.barrier()
         
-        # Find the 
-        address_data = padded_data[i*2**data_dimensionality:(i+1)*2**data_dimensionality]
-
-        # Normalize data 
-        desired_real_statevector = address_data / np.sqrt(sum(np.abs(address_data)**2))  
-
-        # Find the angles "alpha"
-        alpha = solve_spherical_angles(desired_real_statevector)
-        
         extra_ctr_qubits =  list(range(number_of_address_qubits))
         # Create a controlled Amplitude Encoding (QPIE) circuit   
-        qc = circuit_maker_amplitude_encoding(qc, alpha, data_dimensionality ,extra_ctr_qubits , i ,number_of_address_qubits  )
+        qc = circuit_maker_amplitude_encoding(qc, alphas[i], data_dimensionality ,extra_ctr_qubits , i ,number_of_address_qubits  )
      
 
     # Return the final quantum circuit
     return qc 
 
 
+def AmplitudeQRAM_angles(data : Union[list, np.ndarray] , number_of_address_qubits : int = 0 ) -> np.ndarray:
+    """
+    Computes the angles used by the QRAM Amplitude Encoding of the given data.
+
+    Args:
+        data (list): The list of real numbers to be encoded.
+        number_of_address_qubits (int, optional): The number of qubits to use for the address quantum register
+
+    Returns:
+        numpy.ndarray: The 2^d-1 spherical angles "alpha" of the (padded and normalized) data of each address, one row per address,
+                       where d is the number of data qubits. The addresses without data get the angles of the state |0>.
+    """
+    # pad with zeros if needed
+    padded_data = pad_with_zeros(np.array(data))
+
+    number_of_qubits = int ( np.ceil(np.log2(len(padded_data))) )
+
+    if ( number_of_address_qubits >= number_of_qubits or number_of_address_qubits < 0):
+        raise ValueError("Input number_of_address_qubits must be less than the total qubits requaried to encode the data")
+    elif ( number_of_address_qubits == 0 ):
+        return AmplitudeEncoding_angles(padded_data)[np.newaxis, :]
+
+    # One row per address, each one normalized on its own
+    address_data = normalize_address_data(np.reshape(padded_data, (2**number_of_address_qubits, -1)))
+
+    return solve_spherical_angles(address_data)
+
+
+def AmplitudeQRAM_template(number_of_qubits : int , number_of_address_qubits : int = 0 ) -> QuantumCircuit:
+    """
+    Builds the QRAM Amplitude Encoding circuit with the angles as parameters,
+    the gate layout only depends on the number of qubits and address qubits (no gate is pruned).
+
+    Args:
+        number_of_qubits (int): The total number of qubits of the circuit.
+        number_of_address_qubits (int, optional): The number of qubits to use for the address quantum register
+
+    Returns:
+        QuantumCircuit: The circuit with the parameters α[0], ..., α[2^a*(2^d-1)-1], bind them with the flattened output of AmplitudeQRAM_angles.
+    """
+    if ( number_of_address_qubits >= number_of_qubits or number_of_address_qubits < 0):
+        raise ValueError("Input number_of_address_qubits must be less than the total qubits requaried to encode the data")
+    elif ( number_of_address_qubits == 0 ):
+        return AmplitudeEncoding_template(number_of_qubits)
+
+    data_dimensionality = number_of_qubits - number_of_address_qubits
+    angles_per_address = 2**data_dimensionality - 1
+
+    # The angles of address i are α[i*(2^d-1)], ..., α[(i+1)*(2^d-1)-1]
+    alpha = ParameterVector("α", 2**number_of_address_qubits * angles_per_address)
+
+    # Indices of data
+    qr1 = QuantumRegister(number_of_address_qubits, "a") 
+    # Data
+    qr2 = QuantumRegister(data_dimensionality, "d")    
+
+    qc = QuantumCircuit(qr1 ,qr2 )
+
+    # Create a superposition for all the addresses
+    qc.h(range(number_of_address_qubits))
+
+    record_pruning(qc)
+
+    for i in range(2**number_of_address_qubits) : 
+
+        qc.barrier()
+
+        extra_ctr_qubits =  list(range(number_of_address_qubits))
+        address_alpha = alpha[i * angles_per_address : (i + 1) * angles_per_address]
+        # Create a controlled Amplitude Encoding (QPIE) circuit   
+        qc = circuit_maker_amplitude_encoding(qc, address_alpha, data_dimensionality ,extra_ctr_qubits , i ,number_of_address_qubits  )
+
+    return qc
+
+
+def AmplitudeQRAM_statevector(data : Union[list, np.ndarray] , number_of_address_qubits : int = 0 ) -> np.ndarray:
+    """
+    Computes the statevector prepared by the QRAM Amplitude Encoding of the given data,
+    without building or simulating the quantum circuit.
+
+    Args:
+        data (list): The list of real numbers to be encoded.
+        number_of_address_qubits (int, optional): The number of qubits to use for the address quantum register
+
+    Returns:
+        numpy.ndarray: The statevector of the QRAM Amplitude Encoding of the data.
+    """
+    # pad with zeros if needed
+    padded_data = pad_with_zeros(np.array(data))
+    
+    number_of_qubits = int ( np.ceil(np.log2(len(padded_data))) )
+
+    if ( number_of_address_qubits >= number_of_qubits or number_of_address_qubits < 0):
+        raise ValueError("Input number_of_address_qubits must be less than the total qubits requaried to encode the data")
+    elif ( number_of_address_qubits == 0 ):
+        return AmplitudeEncoding_statevector(padded_data)
+
+    # One row per address, each one normalized on its own
+    address_data = normalize_address_data(np.reshape(padded_data, (2**number_of_address_qubits, -1)))
+
+    # The address qubits are the least significant ones and are in a uniform superposition
+    statevector : np.ndarray = address_data.T.reshape(-1) / np.sqrt(2**number_of_address_qubits) + 0j
+
+    return statevector
+
+
+def normalize_address_data(address_data : np.ndarray) -> np.ndarray:
+    """
+    Normalizes the data of each address (row) on its own. The rows without any non-zero value
+    are replaced by the state |0>, which is what the circuit prepares for them.
+
+    Args:
+        address_data (numpy.ndarray): The data of each address as a row.
+
+    Returns:
+        numpy.ndarray: The normalized rows.
+    """
+    norms = np.linalg.norm(address_data, axis=1, keepdims=True)
+
+    zero_state = np.zeros(address_data.shape[1])
+    zero_state[0] = 1
+
+    normalized_data : np.ndarray = np.where(norms > 0, address_data / np.where(norms > 0, norms, 1), zero_state)
+    return normalized_data
+
+
 if __name__ == "__main__" : 
     
     show_plot = True
@@ -1,29 +1,30 @@
 import numpy as np
 from qiskit import QuantumCircuit
-from qiskit.circuit.library import RYGate
-from qiskit.circuit.library import XGate
+from qiskit.circuit import ParameterVector
 from math import pi
+from functools import lru_cache
 
 
 # Typing stuff
-from typing import Union
-
-# Add the parent directory of the current script's directory to the Python path
-import sys
-import os
-
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))  # Get the directory of the current script
-sys.path.append(os.path.dirname(SCRIPT_DIR))  # Add the parent directory to the Python path
+from typing import Optional, Union
 
 # Import Local modules
 from Utilities.utils import pad_with_zeros
+from Utilities.multiplexor import uniformly_controlled_ry
+from Utilities.pruning import PRUNE_TOLERANCE, append_pruned_ry, record_pruning
+from Utilities.gate_factory import controlled_x
 
-def AmplitudeEncoding(data : Union[list, np.ndarray]  ) -> QuantumCircuit:
+
+def AmplitudeEncoding(data : Union[list, np.ndarray] , method : str = "recursive" ) -> QuantumCircuit:
     """
     Encodes the given data into a quantum circuit using Amplitude Encoding (QPIE).
 
     Args:
         data (list): The list of real numbers to be encoded.
+        method (str, optional): The synthesis method of the circuit. Defaults to "recursive".
+            "recursive": Multi-controlled RY gates with a growing number of controls (shown in the examples).
+            "multiplexor": One uniformly controlled RY per qubit with Gray code CNOT ordering, 
+                           it uses 2^n-1 RY and 2^n-2 CNOT gates, better suited for large inputs.
 
     Returns:
         QuantumCircuit: The quantum circuit representing the Amplitude Encoding of the data.
@@ -70,109 +71,291 @@ def AmplitudeEncoding(data : Union[list, np.ndarray]  ) -> QuantumCircuit:
                                                         └────────────┘
 
     """
+    # Find the angles "alpha" (or the angles of the multiplexors)
+    alpha = AmplitudeEncoding_angles(data, method)
+    
+    number_of_qubits = int ( np.log2(len(alpha) + 1) )
+
+    # Create a quantum circuit with multipule qubits
+    qc = QuantumCircuit(number_of_qubits)
+
+     
+    # Create an Amplitude Encoding (QPIE) circuit   
+    if method == "recursive":
+        # The gates pruned during the construction are reported in qc.metadata
+        record_pruning(qc)
+        qc = circuit_maker_amplitude_encoding(qc, alpha, number_of_qubits )
+    else:
+        qc = circuit_maker_multiplexor_amplitude_encoding(qc, alpha, number_of_qubits )
+
+    # Return the final quantum circuit
+    return qc 
+
+
+def AmplitudeEncoding_angles(data : Union[list, np.ndarray] , method : str = "recursive" ) -> np.ndarray:
+    """
+    Computes the angles used by the Amplitude Encoding (QPIE) of the given data.
+
+    Args:
+        data (list): The list of real numbers to be encoded.
+        method (str, optional): The synthesis method of the circuit ("recursive" or "multiplexor"). Defaults to "recursive".
+
+    Returns:
+        numpy.ndarray: The 2^n-1 spherical angles "alpha" of the (padded and normalized) data for the "recursive" method,
+                       or the 2^n-1 angles of the multiplexors (see multiplexor_angles) for the "multiplexor" method.
+    """
+    if method not in ("recursive", "multiplexor"):
+        raise ValueError(f"Unknown method: {method}, it must be either 'recursive' or 'multiplexor'")
+
     # pad with zeros if needed
     padded_data = pad_with_zeros(np.array(data))
     
-    number_of_qubits = int ( np.ceil(np.log2(len(padded_data))) )
-    
     # Normalize data 
     desired_real_statevector = padded_data / np.sqrt(sum(np.abs(padded_data)**2))  
 
     # Find the angles "alpha"
     alpha = solve_spherical_angles(desired_real_statevector)
 
+    if method == "multiplexor":
+        return multiplexor_angles(alpha)
+    return alpha
+
+
+def AmplitudeEncoding_template(number_of_qubits : int , method : str = "recursive" ) -> QuantumCircuit:
+    """
+    Builds the Amplitude Encoding (QPIE) circuit with the angles as parameters,
+    the gate layout only depends on the number of qubits.
+
+    Args:
+        number_of_qubits (int): The number of qubits of the circuit.
+        method (str, optional): The synthesis method of the circuit ("recursive" or "multiplexor"). Defaults to "recursive".
+
+    Returns:
+        QuantumCircuit: The circuit with the parameters α[0], ..., α[2^n-2], bind them with the output of AmplitudeEncoding_angles.
+    """
+    alpha = ParameterVector("α", 2**number_of_qubits - 1)
+
     # Create a quantum circuit with multipule qubits
     qc = QuantumCircuit(number_of_qubits)
 
-     
     # Create an Amplitude Encoding (QPIE) circuit   
-    qc = circuit_maker_amplitude_encoding(qc, alpha, number_of_qubits )
+    if method == "recursive":
+        return circuit_maker_amplitude_encoding(qc, alpha, number_of_qubits )
+    elif method == "multiplexor":
+        return circuit_maker_multiplexor_amplitude_encoding(qc, alpha, number_of_qubits )
+    else:
+        raise ValueError(f"Unknown method: {method}, it must be either 'recursive' or 'multiplexor'")
 
-    # Return the final quantum circuit
-    return qc 
 
+def AmplitudeEncoding_statevector(data : Union[list, np.ndarray] , method : str = "recursive" ) -> np.ndarray:
+    """
+    Computes the statevector prepared by the Amplitude Encoding (QPIE) of the given data,
+    without building or simulating the quantum circuit.
+
+    Args:
+        data (list): The list of real numbers to be encoded.
+        method (str, optional): The synthesis method of the circuit, it does not change the state. Defaults to "recursive".
+
+    Returns:
+        numpy.ndarray: The statevector of the Amplitude Encoding of the data.
+    """
+    # pad with zeros if needed
+    padded_data = pad_with_zeros(np.array(data))
+
+    # Normalize data 
+    statevector : np.ndarray = padded_data / np.linalg.norm(padded_data) + 0j
+
+    return statevector
 
-def circuit_maker_amplitude_encoding(QCircuit:QuantumCircuit, alpha:Union[list, np.ndarray] , n : int ,  control_qubits:list = list() , control_state : int = 0 , target_qubit_offset : int = 0 ) -> QuantumCircuit:
+
+def circuit_maker_amplitude_encoding(QCircuit:QuantumCircuit, alpha:Union[list, np.ndarray, ParameterVector] , n : int ,  control_qubits:Optional[list] = None , control_state : int = 0 , target_qubit_offset : int = 0 , tolerance : Optional[float] = PRUNE_TOLERANCE ) -> QuantumCircuit:
     """
     Encodes amplitudes onto a quantum circuit using a custom amplitude encoding scheme.
 
+    The circuit of n qubits is, recursively: (b) the circuit of the first (n-1) qubits, (c) an (n-1)-qubit controlled
+    RY on the last qubit, (d) (n-1) CNOTs controlled by the last qubit and (e) the circuit of the first (n-1) qubits
+    with an additional control on the last qubit. The recursion is unrolled once per n (see amplitude_encoding_gates),
+    so the circuit is built in a single pass over the angles.
+
+    Rotations whose angle is a multiple of π (within the tolerance) are pruned while the circuit is built:
+    identity rotations are skipped, rotations that only flip their target become X gates, and when the
+    rotation of step c leaves the last qubit in |0> the whole branch controlled by it (steps d and e) is skipped.
+    The numbers of removed and simplified gates are added to QCircuit.metadata["pruned_gates"] and
+    QCircuit.metadata["simplified_gates"].
+
     Args:
         QCircuit (QuantumCircuit): The quantum circuit to which the encoding is applied.
         alpha (array-like): An array of angles for encoding.
         n (int): The number of qubits in the circuit.
-        control_qubits (list, optional): List of control qubits. Defaults to an empty list.
+        control_qubits (list, optional): List of control qubits. Defaults to None (no control qubits).
+        control_state (int, optional): The state of the control qubits that enables the circuit. Defaults to 0.
+        target_qubit_offset (int, optional): The first of the n qubits of the circuit. Defaults to 0.
+        tolerance (float, optional): The tolerance of the pruning. Defaults to PRUNE_TOLERANCE, None disables the pruning.
 
     Returns:
         QuantumCircuit: The modified quantum circuit after applying the custom amplitude encoding.
     """
-    if n == 1 : 
-        if len(control_qubits) == 0 : 
-            QCircuit.ry(alpha[0], control_qubits + [target_qubit_offset + 0])
-        else:
-            multi_ctr_RYGate =  RYGate(alpha[0]).control(len(control_qubits), ctrl_state= control_state)
-            QCircuit.append(multi_ctr_RYGate, control_qubits + [target_qubit_offset + 0] )
-    elif n == 2 : 
-        # Remove duplicates from the list of control qubits
-        control_qubits = list(set(control_qubits))    
-
-        number_of_extra_ctr_qubits = len(control_qubits)
-
-        if number_of_extra_ctr_qubits == 0 : 
-            QCircuit.ry(alpha[0], target_qubit_offset + 0)
-            QCircuit.cry(-alpha[1], target_qubit_offset + 0, target_qubit_offset + 1)
-            QCircuit.cry(pi + alpha[2], target_qubit_offset + 1, target_qubit_offset + 0)
-        else:                         
-            # Apply controlled RY gates
-            
-            # Gate 1
-            multi_ctr_RYGate =  RYGate(alpha[0]).control(number_of_extra_ctr_qubits, ctrl_state= control_state )
-            QCircuit.append(multi_ctr_RYGate, control_qubits + [target_qubit_offset + 0] )
-            
-            # Gate 2
-            multi_ctr_RYGate =  RYGate(-alpha[1]).control(number_of_extra_ctr_qubits+1, ctrl_state= (control_state + 2**len(control_qubits)) )
-            QCircuit.append(multi_ctr_RYGate, control_qubits + [target_qubit_offset + 0] + [target_qubit_offset + 1] )
-
-            # Gate 3
-            multi_ctr_RYGate =  RYGate(pi + alpha[2]).control(number_of_extra_ctr_qubits+1, ctrl_state= (control_state + 2**len(control_qubits)))
-            QCircuit.append(multi_ctr_RYGate, control_qubits + [target_qubit_offset + 1] + [target_qubit_offset + 0] )
-    else : 
-        # Remove duplicates from the list of control qubits
-        control_qubits = list(set(control_qubits))
-        
-        # Step b
-        # Design an (n-1)-qubit arbitrary statevector
-        # generator circuit, recursively, employing the first (n-1) qubits on the
-        # system.
+    # Remove duplicates from the list of control qubits
+    control_qubits = list(dict.fromkeys(control_qubits)) if control_qubits is not None else []
 
-        QCircuit = circuit_maker_amplitude_encoding(QCircuit, alpha, n - 1, control_qubits, control_state, target_qubit_offset)
+    # The qubit and the weight in the control state of the local qubits of the gates
+    qubits = [target_qubit_offset + i for i in range(n)]
+    state_weight = 2**len(control_qubits)
 
+    gates = amplitude_encoding_gates(n)
+    index = 0
+    while index < len(gates):
+        kind , angle_index , local_controls , local_state , target , target_state , skip_to = gates[index]
+        index += 1
 
-        # Step c
-        # Apply  an (n-1)-qubit controlled 𝑅𝑦 (alpha[2**(n-1)-1]) gate, with control on first (n-1)
-        # qubits and target on last qubit.
-        
-        # multi_ctr_RYGate =  RYGate(alpha[n]).control(n-1 + len(control_qubits),label=None)
-        # Note: 2**(len(control_qubits)+n) - 2**(len(control_qubits)) =  2^(len(control_qubits)) + 2^(len(control_qubits)+1) + ... + 2**(len(control_qubits)+n-1)
-        multi_ctr_RYGate =  RYGate(alpha[2**(n-1)-1]).control(n-1 + len(control_qubits), ctrl_state= control_state + 2**(len(control_qubits)) * (2**(n-1) - 1) )
-        QCircuit.append(multi_ctr_RYGate, control_qubits + list(range(target_qubit_offset + 0, target_qubit_offset + n-1)) + [target_qubit_offset + n-1] )
+        gate_controls = control_qubits + [qubits[i] for i in local_controls]
+        gate_state = control_state + state_weight * local_state
 
+        if kind == X_GATE:
+            QCircuit.append(controlled_x(len(gate_controls), gate_state), gate_controls + [qubits[target]])
+            continue
 
-        # Step d 
-        # Apply (n-1) CNOT gates, one by one, on each of the first (n-1) qubits.
-        # Each of these CNOT gates has control on the last qubit.
+        angle = alpha[angle_index]
+        if kind == MINUS_RY_GATE:
+            angle = -angle
+        elif kind == PI_PLUS_RY_GATE:
+            angle = pi + angle
 
-        multi_ctr_XGate =  XGate().control(1 + len(control_qubits),ctrl_state= control_state + 2**(len(control_qubits)) )
-        for i in range(n-1):
-            QCircuit.append(multi_ctr_XGate,  control_qubits + [target_qubit_offset + n-1] + [target_qubit_offset + i] )
-        
+        multiple = append_pruned_ry(QCircuit, angle, gate_controls, gate_state, qubits[target], tolerance, target_state=target_state)
 
-        # Step e            
-        # Apply another (n-1)-qubit arbitrary statevector generator circuit with the last
-        # (2**𝑛−1 − 1) angles, recursively, on first (n-1) qubits. Each gate in this subcircuit
-        # must have additional control from last qubit.
-            
-        control_qubits.append(target_qubit_offset + n-1)        
-        QCircuit = circuit_maker_amplitude_encoding(QCircuit, alpha[2**(n-1):] , n - 1 , control_qubits, control_state + 2**(len(control_qubits)-1) , target_qubit_offset )
+        if skip_to is not None and multiple in (0, 2):
+            # The target stays in |0>, so the gates controlled by it being |1> are never enabled
+            record_pruning(QCircuit, removed=skip_to - index)
+            index = skip_to
+
+    return QCircuit
+
+
+# The kinds of gates of amplitude_encoding_gates: RY(alpha[k]), RY(-alpha[k]), RY(π + alpha[k]) and a CNOT
+RY_GATE , MINUS_RY_GATE , PI_PLUS_RY_GATE , X_GATE = 0 , 1 , 2 , 3
+
+# A gate of amplitude_encoding_gates: (kind, angle index, control qubits, control state, target qubit,
+# state of the target when the controls are enabled, index of the first gate after the ones to skip if the RY is pruned)
+AmplitudeGate = tuple[int, int, tuple[int, ...], int, int, Optional[int], Optional[int]]
+
+
+@lru_cache(maxsize=None)
+def amplitude_encoding_gates(n : int) -> tuple[AmplitudeGate, ...]:
+    """
+    Computes the gates of circuit_maker_amplitude_encoding for n qubits, without pruning, in the order they are
+    applied. The qubits are relative to the first of the n qubits, and the control states do not include the
+    additional control qubits (every control of the gates is enabled by |1>). The gates of n qubits are built 
+    from the ones of (n-1) qubits, from 2 qubits up.
+
+    Args:
+        n (int): The number of qubits.
+
+    Returns:
+        tuple: The gates, see AmplitudeGate. The angles are used in order, alpha[k] by the k-th RY gate.
+    """
+    if n == 1:
+        return ((RY_GATE, 0, (), 0, 0, 0, None),)
+
+    # While they are built, the controls of a gate are split into the ones added by step e (sorted, as the 
+    # recursive version removes their duplicates with a set) and the ones of the gate itself
+    # Gate 3 only rotates the first qubit when the second one is |1>, so it is skipped if Gate 2 leaves it in |0>
+    gates : list[tuple[int, int, tuple[int, ...], tuple[int, ...], int, Optional[int], Optional[int]]] = [
+        (RY_GATE, 0, (), (), 0, 0, None),
+        (MINUS_RY_GATE, 1, (), (0,), 1, 0, 3),
+        (PI_PLUS_RY_GATE, 2, (), (1,), 0, 1, None)]
+
+    for k in range(3, n + 1):
+        # Step b: the gates of the first (k-1) qubits
+        sub_gates = gates
+
+        # Step c: a (k-1)-qubit controlled RY on the last qubit, the gates of steps d and e are skipped if it is pruned
+        end = 2 * len(sub_gates) + k
+        gates = sub_gates + [(RY_GATE, 2**(k-1) - 1, (), tuple(range(k - 1)), k - 1, 0, end)]
+
+        # Step d: (k-1) CNOTs controlled by the last qubit
+        gates += [(X_GATE, 0, (), (k - 1,), i, None, None) for i in range(k - 1)]
+
+        # Step e: the gates of the first (k-1) qubits, with the last angles and an additional control on the last qubit
+        offset = len(gates)
+        gates += [(kind, angle_index + 2**(k-1), added_controls + (k - 1,), controls, target, target_state,
+                   None if skip_to is None else skip_to + offset)
+                  for kind , angle_index , added_controls , controls , target , target_state , skip_to in sub_gates]
+
+    return tuple((kind, angle_index, added_controls + controls, 2**(len(added_controls) + len(controls)) - 1, target, target_state, skip_to)
+                 for kind , angle_index , added_controls , controls , target , target_state , skip_to in gates)
+
+
+def number_of_amplitude_encoding_gates(n : int) -> int:
+    """
+    Computes the number of gates of circuit_maker_amplitude_encoding for n qubits, without pruning.
+
+    Args:
+        n (int): The number of qubits.
+
+    Returns:
+        int: The number of gates.
+    """
+    if n == 1:
+        return 1
+    if n == 2:
+        return 3
+    # Steps b and e, step c and the (n-1) CNOTs of step d
+    return 2 * number_of_amplitude_encoding_gates(n - 1) + 1 + (n - 1)
+
+
+def multiplexor_angles(alpha: np.ndarray) -> np.ndarray:
+    """
+    Computes the angles of the uniformly controlled RY gates (multiplexors) that prepare 
+    the state described by the spherical angles "alpha".
+
+    The qubits are prepared from the most significant to the least significant one. The multiplexor of 
+    level k has k controls (the k most significant qubits) and targets the qubit n-1-k, for every state p of 
+    its controls it splits the norm of the amplitudes with prefix p between the target being 0 and 1. 
+    The last level (k = n-1) uses the signed amplitudes, so it also sets the signs.
+
+    Args:
+        alpha (array-like): The 2^n-1 spherical angles, as returned by solve_spherical_angles.
+
+    Returns:
+        numpy.ndarray: The 2^n-1 angles, the 2^k angles of level k are stored at [2^k-1 : 2^(k+1)-1].
+    """
+    number_of_qubits = int ( np.log2(len(alpha) + 1) )
+
+    # Find the amplitudes described by the spherical angles
+    sin_prod = np.concatenate([[1], np.cumprod(np.sin(np.asarray(alpha) / 2))])
+    amplitudes = np.concatenate([np.cos(np.asarray(alpha) / 2) * sin_prod[:-1], sin_prod[-1:]])
+
+    angles = []
+    for k in range(number_of_qubits):
+        target_qubit = number_of_qubits - 1 - k
+
+        # Amplitudes grouped by the state of the controls (prefix) and the target qubit
+        blocks = amplitudes.reshape(2**k, 2, 2**target_qubit)
+        if target_qubit == 0:
+            angles.append(2 * np.arctan2(blocks[:, 1, 0], blocks[:, 0, 0]))
+        else:
+            norms = np.linalg.norm(blocks, axis=2)
+            angles.append(2 * np.arctan2(norms[:, 1], norms[:, 0]))
+
+    return np.concatenate(angles)
+
+
+def circuit_maker_multiplexor_amplitude_encoding(QCircuit:QuantumCircuit, theta:Union[list, np.ndarray, ParameterVector] , n : int ) -> QuantumCircuit:
+    """
+    Encodes amplitudes onto a quantum circuit using one uniformly controlled RY gate (multiplexor) per qubit.
+
+    Args:
+        QCircuit (QuantumCircuit): The quantum circuit to which the encoding is applied.
+        theta (array-like): The 2^n-1 angles of the multiplexors, as returned by multiplexor_angles.
+        n (int): The number of qubits in the circuit.
+
+    Returns:
+        QuantumCircuit: The modified quantum circuit after applying the amplitude encoding.
+    """
+    for k in range(n):
+        target_qubit = n - 1 - k
+        control_qubits = list(range(target_qubit + 1, n))
+        QCircuit = uniformly_controlled_ry(QCircuit, theta[2**k - 1 : 2**(k+1) - 1], control_qubits, target_qubit)
 
     return QCircuit
 
@@ -189,44 +372,44 @@ def solve_spherical_angles(c: np.ndarray) -> np.ndarray:
     c[n-1]  = sin(a[0]/2) * sin(a[1]/2) * ... * sin(a[n-2]/2) * cos(a[n-1]/2)
     c[n]    = sin(a[0]/2) * sin(a[1]/2) * ... * sin(a[n-2]/2) * sin(a[n-1]/2)
 
+    The product sin(a[0]/2) * ... * sin(a[i-1]/2) is equal to the norm of the tail c[i:], 
+    so all the angles are found at once from the cumulative norms of the tails.
+
     Args:
-        c (array-like): Coefficients representing a spherical function.
+        c (array-like): Coefficients representing a spherical function (normalized). 
+                        A 2D array of shape (batch, len(c)) solves one system per row.
 
     Returns:
         array-like: Spherical angles corresponding to the coefficients with length: len(c)-1.
+                    For a 2D input, an array of shape (batch, len(c)-1).
     """
+    c = np.asarray(c, dtype=float)
+    coefficients = np.atleast_2d(c)
     
-    if (len(c) == 1 ):
-        return  np.array( [2 * np.arccos(c[0])] ) 
-     
-    n = len(c) - 1
-    alpha = np.zeros(n) # Initialize array for spherical angles
+    if coefficients.shape[1] == 1:
+        alpha : np.ndarray = 2 * np.arccos(coefficients)
+        return alpha if c.ndim == 2 else alpha[0]
 
+    abs_c = np.abs(coefficients[:, :-1])
 
-    alpha[0] = 2 * np.arccos(abs(c[0]))     # Calculate alpha for the first coefficient
-    sin_prod = np.sin(alpha[0] / 2)         # Initialize sin product
-    
+    # Norm of each tail c[i:], equal to the product sin(a[0]/2) * ... * sin(a[i-1]/2)
+    tail_norms = np.sqrt(np.cumsum(coefficients[:, ::-1]**2, axis=1)[:, ::-1])[:, :-1]
 
     # Solve the system for possitive c 
-    for i in range(1, n):
-        if sin_prod == 0 : 
-            # Leave alpha as zeros (they can have any value) if sin_prod is zero
-            break
-            alpha[i] = pi 
-        else:
-            alpha[i] = 2 * np.arccos(min(abs(c[i]) / sin_prod , 1))
-            sin_prod *= np.sin(alpha[i] / 2)
+    ratio = np.ones_like(abs_c)
+    ratio[:, 0] = abs_c[:, 0]
+    np.divide(abs_c[:, 1:], tail_norms[:, 1:], out=ratio[:, 1:], where=tail_norms[:, 1:] > 0)
+    # Leave alpha as zeros (they can have any value) if the tail is zero
+    ratio[:, 1:][tail_norms[:, 1:] == 0] = 1
+    alpha = 2 * np.arccos(np.minimum(ratio, 1))
 
     # Adjust the solution for the signs of c
-    for i in range(n):
-        if c[i] < 0 :
-            # Replace with the explementary angle
-            alpha[i] = 2*pi - alpha[i]
+    # Replace with the explementary angle
+    alpha = np.where(coefficients[:, :-1] < 0, 2*pi - alpha, alpha)
 
-    if c[-1] < 0 :
-        alpha[-1] = - alpha[-1]
+    alpha[:, -1] = np.where(coefficients[:, -1] < 0, - alpha[:, -1], alpha[:, -1])
 
-    return alpha
+    return alpha if c.ndim == 2 else alpha[0]
 
 
 
@@ -1,5 +1,6 @@
 import numpy as np
 from qiskit import QuantumCircuit
+from qiskit.circuit import ParameterVector
 
 # Typing stuff
 from typing import Optional, Union
@@ -57,6 +58,34 @@ def AngleEncoding(data : Union[list, np.ndarray] , min_val : Optional[float] = N
 
     number_of_qubits = len(data)
 
+    theta = AngleEncoding_angles(data, min_val, max_val)
+    
+    # Create a quantum circuit with multipule qubits
+    qc = QuantumCircuit(number_of_qubits)
+
+
+    # Apply rotations based on the normalized angles
+    for i in range(number_of_qubits):
+        qc.ry(2 * theta[i] , i)
+
+
+    # Return the final quantum circuit
+    return qc 
+
+
+def AngleEncoding_angles(data : Union[list, np.ndarray] , min_val : Optional[float] = None , max_val : Optional[float]= None ) -> np.ndarray:
+    """
+    Normalizes the given data to the angles (in the range [0, pi/2]) used by the Angle Encoding.
+
+    Args:
+        data (list or numpy.ndarray): The list or array of values to be encoded.
+        min_val (float, optional): The minimum value of the data. If not provided, it will be calculated from the data. Defaults to None.
+        max_val (float, optional): The maximum value of the data. If not provided, it will be calculated from the data. Defaults to None.
+
+    Returns:
+        numpy.ndarray: The angle of each value, the rotation applied to its qubit is twice that angle.
+    """
+
     data = np.array(data)
 
     # Calculate min_val if it is None, otherwise use the provided value
@@ -64,24 +93,88 @@ def AngleEncoding(data : Union[list, np.ndarray] , min_val : Optional[float] = N
     # Calculate max_val if it is None, otherwise use the provided value
     max_val = np.max(data) if max_val is None else max_val
 
-    theta : Union[list, np.ndarray]
-    if number_of_qubits == 1 and min_val == max_val :
-        theta = [0]
-    else:
-        # Normalize to the range [0, pi/2]
-        theta  = (data - min_val) * (np.pi / 2) / (max_val - min_val)
+    if len(data) == 1 and min_val == max_val :
+        return np.zeros(1)
     
+    # Normalize to the range [0, pi/2]
+    return (data - min_val) * (np.pi / 2) / (max_val - min_val)
+
+
+def AngleEncoding_angles_batch(dataset : Union[list, np.ndarray] , min_val : Optional[float] = None , max_val : Optional[float]= None ) -> np.ndarray:
+    """
+    Computes the angles of AngleEncoding_angles for every sample of a dataset in one vectorized step.
+
+    Args:
+        dataset (list or numpy.ndarray): The samples to be encoded, one sample per row.
+        min_val (float, optional): The minimum value of the data. If not provided, it is calculated for each sample. Defaults to None.
+        max_val (float, optional): The maximum value of the data. If not provided, it is calculated for each sample. Defaults to None.
+
+    Returns:
+        numpy.ndarray: A 2D array with the angles of each sample as a row.
+    """
+    dataset = np.array(dataset, dtype=float)
+    if np.ndim(dataset) != 2:
+        raise TypeError("Input dataset must be 2D (one sample per row)")
+
+    # Calculate the min_val and max_val of each sample if they are None, otherwise use the provided values
+    min_vals = np.min(dataset, axis=1, keepdims=True) if min_val is None else np.full((len(dataset), 1), min_val)
+    max_vals = np.max(dataset, axis=1, keepdims=True) if max_val is None else np.full((len(dataset), 1), max_val)
+
+    # Normalize to the range [0, pi/2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        theta : np.ndarray = (dataset - min_vals) * (np.pi / 2) / (max_vals - min_vals)
+
+    if dataset.shape[1] == 1:
+        # A single value is the angle 0 when min_val == max_val
+        theta[(min_vals == max_vals)[:, 0]] = 0
+
+    return theta
+
+
+def AngleEncoding_template(number_of_qubits : int ) -> QuantumCircuit:
+    """
+    Builds the Angle Encoding circuit with the angles as parameters, the gate layout only depends on the number of qubits.
+
+    Args:
+        number_of_qubits (int): The number of qubits of the circuit (equal to the length of the data).
+
+    Returns:
+        QuantumCircuit: The circuit with the parameters θ[0], ..., θ[n-1], bind them with the output of AngleEncoding_angles.
+    """
+    theta = ParameterVector("θ", number_of_qubits)
+
     # Create a quantum circuit with multipule qubits
     qc = QuantumCircuit(number_of_qubits)
 
-
     # Apply rotations based on the normalized angles
     for i in range(number_of_qubits):
         qc.ry(2 * theta[i] , i)
 
+    return qc
 
-    # Return the final quantum circuit
-    return qc 
+
+def AngleEncoding_statevector(data : Union[list, np.ndarray] , min_val : Optional[float] = None , max_val : Optional[float]= None ) -> np.ndarray:
+    """
+    Computes the statevector prepared by the Angle Encoding of the given data,
+    without building or simulating the quantum circuit.
+
+    Args:
+        data (list or numpy.ndarray): The list or array of values to be encoded.
+        min_val (float, optional): The minimum value of the data. If not provided, it will be calculated from the data. Defaults to None.
+        max_val (float, optional): The maximum value of the data. If not provided, it will be calculated from the data. Defaults to None.
+
+    Returns:
+        numpy.ndarray: The statevector of the Angle Encoding of the data.
+    """
+    theta = AngleEncoding_angles(data, min_val, max_val)
+
+    # Each qubit is in the state cos(theta)|0> + sin(theta)|1>, 
+    # the first qubit is the least significant one
+    statevector = np.ones(1, dtype=complex)
+    for angle in theta:
+        statevector = np.kron(np.array([np.cos(angle), np.sin(angle)]), statevector)
+
+    return statevector
 
 
 
@@ -1,34 +1,67 @@
+import os
 import numpy as np
 from qiskit import QuantumCircuit , QuantumRegister
-from qiskit.circuit.library import MCXGate
-
-# Add the parent directory of the current script's directory to the Python path
-import sys
-import os
-
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))  # Get the directory of the current script
-sys.path.append(os.path.dirname(SCRIPT_DIR))  # Add the parent directory to the Python path
+from qiskit.circuit import CircuitInstruction
 
 # Import Local modules
 from Utilities.utils import pad_with_zeros
+from Utilities.esop.esop_minimizer import minimize_esop, SHANNON, POSITIVE_DAVIO, EXPANSION_PREFERENCE
+from Utilities.esop.esop_cache import EsopCache
+from Utilities.esop.esop_cost import CostModel, esop_cost, add_costs
+from Utilities.gate_factory import controlled_x
 
 # Typing stuff
-from typing import Any, Union
+from typing import Any, Optional, Union
+
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+# ESOPs of the truth tables minimized by BasisEncoding, it can be replaced by an EsopCache with a 
+# cache_path to share them across processes and runs
+esop_cache = EsopCache()
 
-import warnings
-from Utilities.esop import call_esop_exe
+# The maximum number of address qubits of a truth table minimized at once, larger ones are split on their top address qubits
+ESOP_MAX_VARS = 16
 
  
 
 
-def BasisEncoding(data : Union[list, np.ndarray] , use_Espresso:bool = True ) -> QuantumCircuit :
+def BasisEncoding(data : Union[list, np.ndarray] , use_Espresso:bool = True , esop_engine : str = "python" , 
+                  esop_workers : Optional[int] = None , esop_timeout : Optional[float] = None , 
+                  esop_max_vars : int = ESOP_MAX_VARS , multi_output : bool = False , use_ancilla : bool = False , 
+                  analyze_planes : bool = True , cost_model : CostModel = esop_cost ) -> QuantumCircuit :
     """
     Encodes the given data into a quantum circuit using Basis Encoding.
 
     Args:
         data (list): The list of integers to be encoded.
         use_Espresso (bool, optional): Flag to indicate whether to use Espresso for optimization. Defaults to True. 
-                                        Can only be used for data length up to 2^16 
+        esop_engine (str, optional): The ESOP minimizer used with use_Espresso. Defaults to "python".
+            "python": The in-process NumPy minimizer of Utilities/esop/esop_minimizer.py.
+            "exe": The bundled esop executable, called twice per bit of the data.
+            The two engines do not find the same ESOPs: the "python" one usually has fewer cubes, but sometimes more 
+            (see `minimize_esop`). So since "python" is the default, the circuits differ from the ones of the 
+            executable, which was the only minimizer before; use "exe" to get them back.
+        esop_workers (int, optional): The maximum number of truth tables minimized at the same time, on a thread pool. 
+                                      Defaults to None: the number of CPUs for the "exe" engine and 1 for the "python" one.
+        esop_timeout (float, optional): The maximum time in seconds of each call of the esop executable ("exe" engine). Defaults to None (no limit).
+        esop_max_vars (int, optional): The maximum number of address qubits of a truth table minimized at once, the truth tables
+                                       of more address qubits are minimized hierarchically (see `minimize_truth_table_hierarchical`).
+                                       Defaults to ESOP_MAX_VARS (16).
+        multi_output (bool, optional): Flag to share the ESOPs between the data qubits: a data qubit can be a copy (a CNOT) of
+                                       an earlier one corrected with the ESOP of their XOR, and the cubes of several data qubits
+                                       are synthesized once (see `share_cubes`). The numbers of copied data qubits and shared
+                                       cubes are added to qc.metadata["copied_bits"] and qc.metadata["shared_cubes"]. Defaults to False.
+        use_ancilla (bool, optional): Flag to compute the shared cubes onto an ancilla qubit "anc" (left in |0>) and fan them out
+                                      with CNOTs, instead of onto one of their data qubits. Defaults to False.
+        analyze_planes (bool, optional): Flag to synthesize without the ESOP minimizer the bits of the data that are constant, 
+                                         copies or complements of an earlier bit, or XOR-linear in the address qubits
+                                         (see `analyze_bit_planes`). The kind of each bit is added to qc.metadata["plane_kinds"].
+                                         Defaults to True.
+        cost_model (callable, optional): The estimated cost (e.g. number of CX gates and depth) of the gates of an ESOP, it
+                                         chooses how each bit is synthesized among its ESOP, the ESOP of its inverse and a 
+                                         gate per address with a 1 (see `cheapest_realization`). The choice for each bit is 
+                                         added to qc.metadata["plane_synthesis"]. Defaults to `Utilities.esop.esop_cost.esop_cost`.
 
     Returns:
         QuantumCircuit: The quantum circuit representing the Basis Encoding of the data.
@@ -129,17 +162,16 @@ def BasisEncoding(data : Union[list, np.ndarray] , use_Espresso:bool = True ) ->
 
     """
 
+    if esop_engine not in ("python", "exe"):
+        raise ValueError(f"Unknown esop_engine: {esop_engine}, it must be either 'python' or 'exe'")
+
     # pad with zeros if needed
     padded_data = pad_with_zeros(np.array(data))
     
     number_of_qubits = int ( np.ceil(np.log2(len(padded_data))) )
 
-    if (number_of_qubits > 16 and use_Espresso ):
-        use_Espresso = False        
-        warnings.warn("Espresso optimization can not be used (in this version) for when the length of the input data is greater than 2^16", UserWarning)
-    
-    # For now only works for integeres
-    bin_data , bit_depth = convert_to_bin(padded_data)
+    # For now only works for integeres, bits[i, j] is the bit j (the most significant one first) of the element i
+    bits , bit_depth = convert_to_bit_matrix(padded_data)
     
     # Indices of data
     qr1 = QuantumRegister(number_of_qubits, "a") 
@@ -153,55 +185,407 @@ def BasisEncoding(data : Union[list, np.ndarray] , use_Espresso:bool = True ) ->
     qc.h(range(number_of_qubits))
     
     if not use_Espresso:
-        # Set up the data 
-        for i in range(len(padded_data)):
-            for j in range(bit_depth):            
-                if bin_data[i][j] == '1' :
-                    qubits_ids = list(range(number_of_qubits)) + [number_of_qubits + bit_depth - j - 1]
-                    qc.append(MCXGate(num_ctrl_qubits=number_of_qubits, ctrl_state=i), qubits_ids )
+        # Set up the data (the ones of the bit matrix, row by row), with one gate per address that is shared by its bits,
+        # the qubits are known to be valid so the gates are appended without the checks of QuantumCircuit.append
+        address_qubits = tuple(qr1)
+        for i in np.flatnonzero(bits.any(axis=1)):
+            gate = controlled_x(number_of_qubits, i)
+            for j in np.flatnonzero(bits[i]):
+                qc._append(CircuitInstruction(gate, address_qubits + (qr2[bit_depth - j - 1],)))
     else:        
-        # Set up the data 
-        not_dict = {"0":"1" , "1":"0"}
-        for j in range(bit_depth):            
-            truth_table = ""
-            inv_truth_table = ""
-            for i in range(len(padded_data)):
-                truth_table += bin_data[i][j]
-                inv_truth_table += not_dict[bin_data[i][j]]
-            
-
-            hex_truth_table = bin_str_to_hex_str(truth_table)
-            inv_hex_truth_table = bin_str_to_hex_str(inv_truth_table)
-            
-            output = call_esop_exe.execute_exe_with_args(call_esop_exe.exe_path , [str(number_of_qubits),hex_truth_table])
-            output_inv = call_esop_exe.execute_exe_with_args(call_esop_exe.exe_path , [str(number_of_qubits),inv_hex_truth_table])
-            
-            minimized_expretion =  call_esop_exe.parse_output(output)
-            minimized_expretion_inv =  call_esop_exe.parse_output(output_inv)
-
-            optimal_minimized_expretion :  list[tuple[list[int], list[int]]]
-
-            if (len(minimized_expretion_inv) < len(minimized_expretion) ):           
-                start_pad : list[tuple[list[int], list[int]]] = [([],[])]
-                optimal_minimized_expretion = start_pad + minimized_expretion_inv  # Insert ([],[]) at index 0 (This adds a NOT gate)
-            else:
-                optimal_minimized_expretion = minimized_expretion
-            
-            for contition in optimal_minimized_expretion:
-                pos_ctrl_qubits_ids = contition[0]
-                neg_ctrl_qubits_ids = contition[1]
-                target_qubit = number_of_qubits + bit_depth - j - 1
-
-                if len(pos_ctrl_qubits_ids) == 0 and len(neg_ctrl_qubits_ids) == 0 :
-                    qc.x(target_qubit)
+        # The truth table of each bit of the data and of its inverse
+        truth_tables : list[str] = []
+        for plane in bits.T:
+            truth_tables += [bits_to_bin_str(plane), bits_to_bin_str(1 - plane)]
+
+        # The ESOP of each bit of the data and the earlier bit that is copied (with a CNOT) to it before its ESOP, if any
+        plane_esops : list[list[tuple[list[int], list[int]]]] = [[] for _ in range(bit_depth)]
+        copy_sources : list[Optional[int]] = [None] * bit_depth
+        plane_kinds = ["esop"] * bit_depth
+        if analyze_planes:
+            plane_kinds , plane_esops , copy_sources = analyze_bit_planes(number_of_qubits, truth_tables[0::2], truth_tables[1::2])
+            qc.metadata["plane_kinds"] = plane_kinds
+
+        # Only the other bits are minimized, they are independent, so they are minimized concurrently
+        esop_planes = [j for j in range(bit_depth) if plane_kinds[j] == "esop"]
+        esop_truth_tables = [truth_table for j in esop_planes for truth_table in truth_tables[2*j : 2*j + 2]]
+        minimized_expretions = minimize_truth_tables(number_of_qubits, esop_truth_tables, esop_engine, esop_workers, esop_timeout, esop_max_vars)
+
+        # How each bit is synthesized, the bits that are minimized use the cheapest of their realizations
+        plane_synthesis = list(plane_kinds)
+        plane_costs = [cost_model(esop) for esop in plane_esops]
+        for k , j in enumerate(esop_planes):
+            plane_synthesis[j] , plane_esops[j] , plane_costs[j] = cheapest_realization(number_of_qubits, truth_tables[2*j], 
+                                                                    minimized_expretions[2*k], minimized_expretions[2*k + 1], cost_model)
+
+        if multi_output:
+            # Each bit can also be a copy of an earlier bit, corrected with the ESOP of their XOR
+            pairs = [(i, j) for j in esop_planes for i in range(j) if plane_kinds[i] != "constant"]
+            xor_truth_tables : list[str] = []
+            for i , j in pairs:
+                xor_truth_tables += [xor_bin_str(truth_tables[2*i], truth_tables[2*j]), xor_bin_str(truth_tables[2*i], truth_tables[2*j + 1])]
+            xor_expretions = minimize_truth_tables(number_of_qubits, xor_truth_tables, esop_engine, esop_workers, esop_timeout, esop_max_vars)
+
+            copy_cost = cost_model([([0], [])])  # A CNOT
+            for k , (i , j) in enumerate(pairs):
+                _ , xor_esop , xor_cost = cheapest_realization(number_of_qubits, xor_truth_tables[2*k], 
+                                                              xor_expretions[2*k], xor_expretions[2*k + 1], cost_model, direct=False)
+                xor_cost = add_costs(xor_cost, copy_cost)
+                if xor_cost < plane_costs[j]:
+                    plane_synthesis[j] , plane_esops[j] , plane_costs[j] = "xor_copy" , xor_esop , xor_cost
+                    copy_sources[j] = i
+            qc.metadata["copied_bits"] = bit_depth - copy_sources.count(None)
+
+            shared_cubes , plane_esops = share_cubes(plane_esops, min_targets=3 if use_ancilla else 2)
+            qc.metadata["shared_cubes"] = len(shared_cubes)
+
+            if use_ancilla and shared_cubes:
+                ancilla = QuantumRegister(1, "anc")
+                qc.add_register(ancilla)
+
+            for contition , planes in shared_cubes:
+                target_qubits = [number_of_qubits + bit_depth - j - 1 for j in planes]
+
+                if use_ancilla:
+                    # Compute the cube onto the ancilla, copy it to every data qubit and uncompute it
+                    append_cube(qc, contition, ancilla[0])
+                    for target_qubit in target_qubits:
+                        qc.cx(ancilla[0], target_qubit)
+                    append_cube(qc, contition, ancilla[0])
                 else:
-                    kkk =  pos_ctrl_qubits_ids + neg_ctrl_qubits_ids + [target_qubit]
-                    qc.append(MCXGate(num_ctrl_qubits=len(kkk)-1, ctrl_state= 2**(len(pos_ctrl_qubits_ids))-1 ), kkk )
+                    # Each other data qubit gets the change of the first one: t ^= h , h ^= cube , t ^= h
+                    host_qubit = target_qubits[0]
+                    for target_qubit in target_qubits[1:]:
+                        qc.cx(host_qubit, target_qubit)
+                    append_cube(qc, contition, host_qubit)
+                    for target_qubit in target_qubits[1:]:
+                        qc.cx(host_qubit, target_qubit)
+
+        qc.metadata["plane_synthesis"] = plane_synthesis
+
+        # Set up the data (the bits are set in order, so the copied bits are already set)
+        for j in range(bit_depth):            
+            source = copy_sources[j]
+            if source is not None:
+                qc.cx(number_of_qubits + bit_depth - source - 1, number_of_qubits + bit_depth - j - 1)
+
+            for contition in plane_esops[j]:
+                append_cube(qc, contition, number_of_qubits + bit_depth - j - 1)
     
     # Return the final quantum circuit
     return qc 
 
 
+def analyze_bit_planes(number_of_qubits : int , truth_tables : list[str] , inv_truth_tables : list[str] 
+                       ) -> tuple[list[str], list[list[tuple[list[int], list[int]]]], list[Optional[int]]]:
+    """
+    Finds the bits of the data (bit planes) that do not need the ESOP minimizer:
+        "constant": The same value for every address, no gate or a X gate.
+        "copy": The same truth table as an earlier bit, a CNOT from its data qubit.
+        "complement": The inverse truth table of an earlier bit, a CNOT from its data qubit and a X gate.
+        "linear": An XOR of some address qubits (and possibly 1), a CNOT from each of them.
+    The other bits are "esop".
+
+    Args:
+        number_of_qubits (int): The number of address qubits.
+        truth_tables (list): The truth table of each bit, see `minimize_truth_table`.
+        inv_truth_tables (list): The inverse of each truth table.
+
+    Returns:
+        tuple: The kind of each bit, its ESOP (empty for the "esop" bits) and the earlier bit that is copied to it (or None).
+    """
+    addresses = np.arange(2**number_of_qubits)
+
+    plane_kinds : list[str] = []
+    plane_esops : list[list[tuple[list[int], list[int]]]] = []
+    copy_sources : list[Optional[int]] = []
+
+    # The first bit of each truth table that is not constant
+    first_planes : dict[str, int] = {}
+    for j , (truth_table , inv_truth_table) in enumerate(zip(truth_tables, inv_truth_tables)):
+        values = bin_str_to_bits(truth_table)
+        source : Optional[int] = None
+        esop : list[tuple[list[int], list[int]]] = []
+        not_gate : list[tuple[list[int], list[int]]] = [([], [])]
+
+        if not values.any() or values.all():
+            kind = "constant"
+            esop = not_gate if values[0] else []
+        else:
+            # An XOR of address qubits is given by its value at 0 and at the addresses with a single 1
+            address_qubits = [k for k in range(number_of_qubits) if values[2**k] != values[0]]
+            linear_values = np.full(len(values), values[0])
+            for k in address_qubits:
+                linear_values ^= (addresses >> k) & 1 == 1
+            is_linear = np.array_equal(values, linear_values)
+
+            # A copy costs a CNOT and a complement a CNOT and a X gate, a linear bit a CNOT per address qubit
+            if truth_table in first_planes and not (is_linear and len(address_qubits) <= 1):
+                kind , source = "copy" , first_planes[truth_table]
+            elif inv_truth_table in first_planes and not (is_linear and len(address_qubits) <= 2):
+                kind , source , esop = "complement" , first_planes[inv_truth_table] , not_gate
+            elif is_linear:
+                kind = "linear"
+                esop = [([k], []) for k in address_qubits]
+                if values[0]:
+                    # 1 ^ x is ~x, a CNOT with a negative control instead of a X gate
+                    esop[0] = ([], [address_qubits[0]])
+            else:
+                kind = "esop"
+
+            first_planes.setdefault(truth_table, j)
+
+        plane_kinds.append(kind)
+        plane_esops.append(esop)
+        copy_sources.append(source)
+
+    return plane_kinds , plane_esops , copy_sources
+
+
+def cheapest_realization(number_of_qubits : int , truth_table : str , esop : list[tuple[list[int], list[int]]] , 
+                         esop_inv : list[tuple[list[int], list[int]]] , cost_model : CostModel = esop_cost , 
+                         direct : bool = True ) -> tuple[str, list[tuple[list[int], list[int]]], tuple[int, int]]:
+    """
+    Chooses the cheapest realization of a bit of the data, according to the cost model:
+        "esop": The gates of the ESOP of its truth table.
+        "esop_inverse": A X gate and the gates of the ESOP of the inverse truth table.
+        "direct": A gate controlled by every address qubit for each address with a 1. It is only scored when it has
+                  fewer gates than the ESOPs, otherwise its gates (with the most controls) can not be cheaper.
+    The first one is chosen when they have the same cost.
+
+    Args:
+        number_of_qubits (int): The number of address qubits.
+        truth_table (str): The truth table of the bit.
+        esop (list): The ESOP of the truth table.
+        esop_inv (list): The ESOP of the inverse truth table.
+        cost_model (callable, optional): The estimated cost of the gates of an ESOP. Defaults to `esop_cost`.
+        direct (bool, optional): Flag to also score the "direct" realization. Defaults to True.
+
+    Returns:
+        tuple: The name of the chosen realization, its cubes (the X gate is the constant cube ([], [])) and its cost.
+    """
+    not_gate : list[tuple[list[int], list[int]]] = [([],[])]
+    candidates = {"esop": esop, "esop_inverse": not_gate + esop_inv}
+
+    ones = truth_table.count("1")
+    if direct and ones < min(len(candidate) for candidate in candidates.values()):
+        candidates["direct"] = minterm_esop(number_of_qubits, truth_table)
+
+    costs = {name: cost_model(candidate) for name, candidate in candidates.items()}
+    name = min(costs, key=lambda name: costs[name])
+    return name , candidates[name] , costs[name]
+
+
+def minterm_esop(number_of_qubits : int , truth_table : str ) -> list[tuple[list[int], list[int]]]:
+    """
+    The ESOP of a truth table with a cube (with every address qubit) for each address with a 1.
+
+    Examples:
+        >>> minterm_esop(2, "0100")
+        [([0], [1])]
+    """
+    esop : list[tuple[list[int], list[int]]] = []
+    for address in np.flatnonzero(bin_str_to_bits(truth_table)):
+        pos = [k for k in range(number_of_qubits) if (address >> k) & 1]
+        neg = [k for k in range(number_of_qubits) if not (address >> k) & 1]
+        esop.append((pos, neg))
+    return esop
+
+
+def append_cube(qc : QuantumCircuit , cube : tuple[list[int], list[int]] , target_qubit : Any ) -> None :
+    """
+    Flips the target qubit for the addresses of a cube of an ESOP: an X gate for the constant cube ([], []),
+    a multi-controlled X gate otherwise.
+
+    Args:
+        qc (QuantumCircuit): The circuit where the gate is added.
+        cube (tuple): The address qubits that must be 1 and the ones that must be 0.
+        target_qubit (int or Qubit): The target qubit.
+    """
+    pos_ctrl_qubits_ids , neg_ctrl_qubits_ids = cube
+
+    if len(pos_ctrl_qubits_ids) == 0 and len(neg_ctrl_qubits_ids) == 0 :
+        qc.x(target_qubit)
+    else:
+        kkk =  pos_ctrl_qubits_ids + neg_ctrl_qubits_ids + [target_qubit]
+        qc.append(controlled_x(len(kkk)-1, 2**(len(pos_ctrl_qubits_ids))-1 ), kkk )
+
+
+def share_cubes(plane_esops : list[list[tuple[list[int], list[int]]]] , min_targets : int = 2 , 
+                min_controls : int = 2 ) -> tuple[list[tuple[tuple[list[int], list[int]], list[int]]], list[list[tuple[list[int], list[int]]]]]:
+    """
+    Finds the cubes that are in the ESOPs of several bits of the data (e.g. for correlated data such as small integers
+    or images), so that they are synthesized once instead of once per data qubit.
+
+    Only the cubes with at least min_controls controls are shared: a cube with fewer controls is a X or a CNOT gate,
+    which is not more expensive than the CNOTs that copy it.
+
+    Args:
+        plane_esops (list): The ESOP of each bit of the data.
+        min_targets (int, optional): The minimum number of ESOPs that contain a shared cube. Defaults to 2.
+        min_controls (int, optional): The minimum number of controls of a shared cube. Defaults to 2.
+
+    Returns:
+        tuple: The shared cubes, each one with the indices of the ESOPs that contain it (in the order in which they are found),
+               and the ESOPs without the shared cubes.
+    """
+    # The ESOPs that contain each cube, a cube is identified by its sets of controls
+    planes_of_cubes : dict[tuple[tuple[int, ...], tuple[int, ...]], list[int]] = {}
+    for j , esop in enumerate(plane_esops):
+        for pos , neg in esop:
+            if len(pos) + len(neg) >= min_controls:
+                planes_of_cubes.setdefault((tuple(sorted(pos)), tuple(sorted(neg))), []).append(j)
+
+    shared_keys = {key for key, planes in planes_of_cubes.items() if len(set(planes)) >= min_targets and len(planes) == len(set(planes))}
+
+    shared_cubes = [((list(pos), list(neg)), planes) for (pos, neg), planes in planes_of_cubes.items() if (pos, neg) in shared_keys]
+    remaining_esops = [[(pos, neg) for pos, neg in esop if (tuple(sorted(pos)), tuple(sorted(neg))) not in shared_keys]
+                       for esop in plane_esops]
+
+    return shared_cubes , remaining_esops
+
+
+def minimize_truth_tables(number_of_qubits : int , truth_tables : list[str] , esop_engine : str = "python" , 
+                          max_workers : Optional[int] = None , timeout : Optional[float] = None , 
+                          max_vars : int = ESOP_MAX_VARS ) -> list[list[tuple[list[int], list[int]]]]:
+    """
+    Finds the ESOPs of several truth tables at the same time on a thread pool, the esop executable runs in its
+    own process (and NumPy releases the GIL), so the threads do not wait for each other.
+
+    Args:
+        number_of_qubits (int): The number of variables (address qubits) of the truth tables.
+        truth_tables (list): The truth tables, see `minimize_truth_table`.
+        esop_engine (str, optional): The ESOP minimizer, "python" or "exe". Defaults to "python".
+        max_workers (int, optional): The maximum number of truth tables minimized at the same time.
+                                     Defaults to None: the number of CPUs for the "exe" engine and 1 for the "python" one.
+        timeout (float, optional): The maximum time in seconds of each call of the esop executable. Defaults to None (no limit).
+        max_vars (int, optional): The maximum number of variables of a truth table minimized at once. Defaults to ESOP_MAX_VARS (16).
+
+    Returns:
+        list: The ESOP of each truth table, in the same order.
+    """
+    if max_workers is None:
+        max_workers = (os.cpu_count() or 1) if esop_engine == "exe" else 1
+    if max_workers < 1:
+        raise ValueError("Input max_workers must be at least 1")
+
+    minimize = partial(minimize_truth_table_hierarchical, number_of_qubits, esop_engine=esop_engine, timeout=timeout, max_vars=max_vars)
+
+    if max_workers == 1 or len(truth_tables) <= 1:
+        return [minimize(truth_table) for truth_table in truth_tables]
+
+    # `map` keeps the order of the truth tables and raises the first error (e.g. a timeout) here
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(truth_tables))) as pool:
+        return list(pool.map(minimize, truth_tables))
+
+
+def minimize_truth_table_hierarchical(number_of_qubits : int , truth_table : str , esop_engine : str = "python" , 
+                                      timeout : Optional[float] = None , max_vars : int = ESOP_MAX_VARS ) -> list[tuple[list[int], list[int]]]:
+    """
+    Finds the ESOP of a truth table of any size, splitting it on its top address qubits into sub-tables of at most
+    max_vars address qubits that are minimized with `minimize_truth_table`.
+
+    The top address qubits are expanded like in `Utilities.esop.esop_minimizer.minimize_esop`: the truth table is split
+    into the halves f0 and f1 of its most significant address qubit, and the ESOPs of the two cheapest of f0, f1 and
+    f0 ^ f1 are merged with that qubit as an added control (Shannon, positive Davio or negative Davio expansion).
+    For k top address qubits, at most 3^k sub-tables are minimized, and the repeated ones are found in `esop_cache`.
+
+    Args:
+        number_of_qubits (int): The number of variables (address qubits) of the truth table.
+        truth_table (str): The value ('0' or '1') of the function for each address.
+        esop_engine (str, optional): The ESOP minimizer of the sub-tables, "python" or "exe". Defaults to "python".
+        timeout (float, optional): The maximum time in seconds of each call of the esop executable ("exe" engine). Defaults to None (no limit).
+        max_vars (int, optional): The maximum number of variables of a sub-table. Defaults to ESOP_MAX_VARS (16).
+
+    Returns:
+        list: The cubes of the ESOP, each one as a tuple (pos, neg) with the address qubits that must be 1 and 0.
+    """
+    if max_vars < 1:
+        raise ValueError("Input max_vars must be at least 1")
+
+    if number_of_qubits <= max_vars:
+        return minimize_truth_table(number_of_qubits, truth_table, esop_engine, timeout)
+
+    # The addresses of the top half have the most significant address qubit set to 1
+    var = number_of_qubits - 1
+    half = len(truth_table) // 2
+    f0 , f1 = truth_table[:half] , truth_table[half:]
+    f2 = xor_bin_str(f0, f1)
+
+    child_esops = [minimize_truth_table_hierarchical(var, f, esop_engine, timeout, max_vars) for f in (f0, f1, f2)]
+
+    # The most expensive child is not used (the same preference as minimize_esop when the costs are equal)
+    child_costs = np.array([len(child_esop) for child_esop in child_esops])
+    expansion = EXPANSION_PREFERENCE[np.argmax(child_costs[EXPANSION_PREFERENCE])]
+    esop_0 , esop_1 , esop_2 = child_esops
+
+    if expansion == SHANNON:
+        return [(pos, neg + [var]) for pos, neg in esop_0] + [(pos + [var], neg) for pos, neg in esop_1]
+    elif expansion == POSITIVE_DAVIO:
+        return esop_0 + [(pos + [var], neg) for pos, neg in esop_2]
+    else:   # Negative Davio
+        return esop_1 + [(pos, neg + [var]) for pos, neg in esop_2]
+
+
+def minimize_truth_table(number_of_qubits : int , truth_table : str , esop_engine : str = "python" , timeout : Optional[float] = None ) -> list[tuple[list[int], list[int]]]:
+    """
+    Finds the ESOP of a truth table, through `esop_cache` so that each truth table is only minimized once.
+
+    Args:
+        number_of_qubits (int): The number of variables (address qubits) of the truth table.
+        truth_table (str): The value ('0' or '1') of the function for each address.
+        esop_engine (str, optional): The ESOP minimizer, "python" or "exe". Defaults to "python".
+        timeout (float, optional): The maximum time in seconds of the call of the esop executable ("exe" engine). Defaults to None (no limit).
+
+    Returns:
+        list: The cubes of the ESOP, each one as a tuple (pos, neg) with the address qubits that must be 1 and 0.
+    """
+    hex_truth_table = bin_str_to_hex_str(truth_table)
+
+    def minimize() -> list[tuple[list[int], list[int]]]:
+        if esop_engine == "python":
+            return minimize_esop(bin_str_to_bits(truth_table))
+
+        # The ESOP wrapper is only imported when it is used
+        from Utilities.esop import call_esop_exe
+
+        output = call_esop_exe.execute_exe_with_args(call_esop_exe.exe_path , [str(number_of_qubits), hex_truth_table], timeout)
+        return call_esop_exe.parse_output(output)
+
+    return esop_cache.get((number_of_qubits, hex_truth_table, esop_engine), minimize)
+
+
+def BasisEncoding_statevector(data : Union[list, np.ndarray] , *args : Any , **kwargs : Any ) -> np.ndarray :
+    """
+    Computes the statevector prepared by the Basis Encoding of the given data,
+    without building or simulating the quantum circuit.
+
+    Args:
+        data (list): The list of integers to be encoded.
+        *args, **kwargs: The circuit synthesis options of BasisEncoding (e.g. use_Espresso), they do not change the state.
+
+    Returns:
+        numpy.ndarray: The statevector of the Basis Encoding of the data.
+    """
+
+    # pad with zeros if needed
+    padded_data = pad_with_zeros(np.array(data))
+    
+    number_of_qubits = int ( np.ceil(np.log2(len(padded_data))) )
+
+    # For now only works for integeres
+    _ , bit_depth = convert_to_bit_matrix(padded_data)
+
+    # Two's complement value stored in the data qubits for each address
+    values = np.mod(padded_data.astype(np.int64), 2**bit_depth)
+
+    # One term for every address, the address qubits are the least significant ones
+    statevector = np.zeros(2**(number_of_qubits + bit_depth), dtype=complex)
+    statevector[np.arange(len(padded_data)) + values * 2**number_of_qubits] = 1 / np.sqrt(len(padded_data))
+
+    return statevector
+
+
 def convert_to_bin(arr: Union[list, np.ndarray]) -> tuple[list[str],int]:
     """
     Converts a list of integers to their binary representations with a given bit width.
@@ -212,8 +596,24 @@ def convert_to_bin(arr: Union[list, np.ndarray]) -> tuple[list[str],int]:
     Returns:
         tuple: A tuple containing the binary representations of the integers in `arr` and the maximum length of binary strings.
     """
+    bits , max_length = convert_to_bit_matrix(arr)
+
+    return [bits_to_bin_str(row) for row in bits] , max_length
+
+
+def convert_to_bit_matrix(arr: Union[list, np.ndarray]) -> tuple[np.ndarray,int]:
+    """
+    Converts a list of integers to the bits of their binary representations (two's complement if there are negative 
+    integers), with the same bit width for all of them.
+
+    Args:
+        arr (list): The list of integers to be converted.
+
+    Returns:
+        tuple: A uint8 matrix with the bits of each integer in a row, the most significant one first, and the bit width.
+    """
     if all_integers(arr):  # Check if all elements in the array are integers
-        return int_to_binary(arr)  # Convert integers to binary
+        return int_to_bit_matrix(arr)  # Convert integers to binary
     else:
         # If the array contains non-integer elements, raise a ValueError
         raise ValueError(
@@ -236,6 +636,13 @@ def all_integers(arr: Union[list, np.ndarray]) -> bool :
     Returns:
         bool: True if all elements are integers or floats representing integers, False otherwise.
     """
+    values = np.asarray(arr)
+    if np.issubdtype(values.dtype, np.integer) or np.issubdtype(values.dtype, np.bool_):
+        return True
+    if np.issubdtype(values.dtype, np.floating):
+        # NaN and infinite values are not integers
+        return bool(np.all(np.mod(values, 1) == 0))
+
     for element in arr:
         # Check if the element is an integer or a float representing an integer
         if not isinstance(element, int) and not element.is_integer():
@@ -254,19 +661,71 @@ def int_to_binary(arr: Union[list[int], np.ndarray[np.int_,Any]]) -> tuple[list[
     Returns:
         tuple: A tuple containing the binary representations of the integers in `arr` and the maximum length of binary strings.
     """
-    binary_array = []  # Initialize an empty list to store binary representations
-    max_abs_value : int = max(map(abs, arr)) # type: ignore # Find the maximum absolute value in the array 
-    max_length = len(np.binary_repr(int(max_abs_value)))  # Calculate the maximum number of bits needed for any integer
+    bits , max_length = int_to_bit_matrix(arr)
+
+    # Convert each integer to binary representation with the specified width
+    binary_array = [bits_to_bin_str(row) for row in bits]
+    
+    return binary_array, max_length
+
+
+def int_to_bit_matrix(arr: Union[list[int], np.ndarray[np.int_,Any]]) -> tuple[np.ndarray,int]:
+    """
+    Converts a list of integers to the bits of their binary representations, see `int_to_binary`.
+
+    Args:
+        arr (list): The list of integers to be converted.
+
+    Returns:
+        tuple: A uint8 matrix with the bits of each integer in a row, the most significant one first, and the bit width.
+    """
+    values = np.asarray(arr).astype(np.int64)
+    max_abs_value = int(np.max(np.abs(values))) # Find the maximum absolute value in the array 
+    max_length = max(max_abs_value.bit_length(), 1)  # Calculate the maximum number of bits needed for any integer
     
     # Add one bit for the "sign" bit if there are negative numbers in the array
-    if min(arr) < 0:        
+    if np.min(values) < 0:        
         max_length += 1 
         # This could be optimized in special cases, when -2**i is in arr but 2**i is not, to use one less bit 
 
-    # Convert each integer to binary representation with the specified width
-    binary_array = list(map(lambda num: np.binary_repr(int(num), width=max_length), arr))
-    
-    return binary_array, max_length
+    # The bits of the two's complement representation, the shifts of the most significant bit first
+    shifts = np.arange(max_length - 1, -1, -1, dtype=np.int64)
+    bits = ((values[:, np.newaxis] >> shifts) & 1).astype(np.uint8)
+
+    return bits, max_length
+
+
+def bits_to_bin_str(bits: np.ndarray) -> str:
+    """
+    Converts an array of bits (0 or 1) to a binary string.
+
+    Examples:
+        >>> bits_to_bin_str(np.array([1, 0, 1, 1]))
+        '1011'
+    """
+    return (np.asarray(bits, dtype=np.uint8) + ord("0")).tobytes().decode()
+
+
+def bin_str_to_bits(binary_num: str) -> np.ndarray:
+    """
+    Converts a binary string to a boolean array, the inverse of `bits_to_bin_str`.
+
+    Examples:
+        >>> bin_str_to_bits("1011")
+        array([ True, False,  True,  True])
+    """
+    bits : np.ndarray = np.frombuffer(binary_num.encode(), dtype=np.uint8) == ord("1")
+    return bits
+
+def xor_bin_str(binary_num_1: str, binary_num_2: str) -> str:
+    """
+    Computes the bitwise XOR of two binary strings of the same length.
+
+    Examples:
+        >>> xor_bin_str("0110", "0011")
+        '0101'
+    """
+    return format(int(binary_num_1, 2) ^ int(binary_num_2, 2), f"0{len(binary_num_1)}b")
 
 def bin_str_to_hex_str(binary_num: str) -> str:
     """
@@ -286,17 +745,11 @@ def bin_str_to_hex_str(binary_num: str) -> str:
         >>> bin_str_to_hex_str("111100001111")
         'f0f'
     """
-    lookup_table = {
-        "0000": "0", "0001": "1", "0010": "2", "0011": "3",
-        "0100": "4", "0101": "5", "0110": "6", "0111": "7",
-        "1000": "8", "1001": "9", "1010": "a", "1011": "b",
-        "1100": "c", "1101": "d", "1110": "e", "1111": "f",
-        "00": "0", "01": "1", "10": "2", "11": "3"
-    }
-    hex_num = ""
-    for i in range(0, len(binary_num), 4):
-        chunk = binary_num[i:i + 4]
-        hex_num += lookup_table[chunk]
+    # The groups of 4 bits as bytes (two hex digits each), a last group of fewer bits is a hex digit on its own
+    full_length = len(binary_num) - len(binary_num) % 4
+    hex_num = np.packbits(bin_str_to_bits(binary_num[:full_length])).tobytes().hex()[:full_length // 4]
+    if full_length < len(binary_num):
+        hex_num += format(int(binary_num[full_length:], 2), "x")
     return hex_num
 
 
@@ -1,25 +1,22 @@
 # -*- coding: utf-8 -*-
 import numpy as np
 from qiskit import QuantumCircuit , QuantumRegister
+from qiskit.circuit import ParameterVector
 from qiskit.circuit.library import MCXGate
-from qiskit.circuit.library import CRYGate , RYGate
-
-# Add the parent directory of the current script's directory to the Python path
-import sys
-import os
-
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))  # Get the directory of the current script
-sys.path.append(os.path.dirname(SCRIPT_DIR))  # Add the parent directory to the Python path
+from qiskit.circuit.library import CRYGate
 
 # Import Local modules
 from Utilities.utils import pad_with_zeros
+from Utilities.pruning import append_pruned_ry, record_pruning
+from Utilities.gate_factory import controlled_ry
+from Utilities.multiplexor import uniformly_controlled_ry
 
 # Typing stuff
 from typing import Any, Union, Optional
 
 
 
-def FRQIEncoding(data : Union[list, np.ndarray] , min_val : Optional[float] = None , max_val : Optional[float]= None ) -> QuantumCircuit :
+def FRQIEncoding(data : Union[list, np.ndarray] , min_val : Optional[float] = None , max_val : Optional[float]= None , method : str = "controlled" ) -> QuantumCircuit :
     """
     Encodes the given data into a quantum circuit using FRQI Encoding.
 
@@ -27,6 +24,10 @@ def FRQIEncoding(data : Union[list, np.ndarray] , min_val : Optional[float] = No
         data (list or numpy.ndarray): The list or array of values to be encoded.
         min_val (float, optional): The minimum value of the data. If not provided, it will be calculated from the data. Defaults to None.
         max_val (float, optional): The maximum value of the data. If not provided, it will be calculated from the data. Defaults to None.
+        method (str, optional): The synthesis method of the circuit. Defaults to "controlled".
+            "controlled": One RY gate controlled by every address qubit per address and value (shown in the examples).
+            "multiplexor": One uniformly controlled RY per data qubit with Gray code CNOT ordering, 
+                           it uses 2^n RY and 2^n CNOT gates per data qubit, better suited for large images.
 
     Returns:
         QuantumCircuit: The quantum circuit representing the FRQI Encoding of the data.
@@ -55,12 +56,14 @@ def FRQIEncoding(data : Union[list, np.ndarray] , min_val : Optional[float] = No
         >>> print(qc)
 
                  ┌───┐
-            a_0: ┤ H ├────o──────────■─────────────o─────────────■───────
-                 ├───┤    │          │             │             │
-            a_1: ┤ H ├────o──────────o─────────────■─────────────■───────
-                 └───┘┌───┴───┐┌─────┴─────┐┌──────┴──────┐┌─────┴──────┐
-              d: ─────┤ Ry(0) ├┤ Ry(2.119) ├┤ Ry(0.46816) ├┤ Ry(3.0307) ├
-                      └───────┘└───────────┘└─────────────┘└────────────┘
+            a_0: ┤ H ├──────■─────────────o─────────────■───────
+                 ├───┤      │             │             │
+            a_1: ┤ H ├──────o─────────────■─────────────■───────
+                 └───┘┌─────┴─────┐┌──────┴──────┐┌─────┴──────┐
+              d: ─────┤ Ry(2.119) ├┤ Ry(0.46816) ├┤ Ry(3.0307) ├
+                      └───────────┘└─────────────┘└────────────┘
+        >>> qc.metadata  # The Ry(0) of the first address is pruned
+            {'pruned_gates': 1, 'simplified_gates': 0}
           
         
     Example 3 (positive integers):
@@ -105,6 +108,66 @@ def FRQIEncoding(data : Union[list, np.ndarray] , min_val : Optional[float] = No
 
     """
 
+    theta = FRQIEncoding_angles(data, min_val, max_val, method)
+   
+    number_of_qubits = int ( np.ceil(np.log2(len(theta))) )
+
+    data_dimensionality = np.size(theta, axis=1) 
+
+    # Indices of data
+    qr1 = QuantumRegister(number_of_qubits, "a") 
+    # Data
+    qr2 = QuantumRegister(data_dimensionality, "d")    
+
+    
+    # Create a quantum circuit with multipule qubits
+    qc = QuantumCircuit(qr1 ,qr2 )
+
+    
+    # Create a superposition for all the addresses
+    qc.h(range(number_of_qubits))
+
+    if method == "multiplexor":
+        # All the addresses of a data qubit at once
+        for j in range(data_dimensionality):
+            uniformly_controlled_ry(qc, 2*theta[:, j], list(range(number_of_qubits)), number_of_qubits + data_dimensionality - j - 1)
+        return qc
+
+    # The gates pruned during the construction are reported in qc.metadata
+    record_pruning(qc)
+
+
+    # Set up the data 
+    for i in range(len(theta)):
+        for j in range(data_dimensionality):      
+                  
+            # The data qubit is in |0> for the address i, so RY(0) is skipped and RY(π) becomes an X gate
+            append_pruned_ry(qc, 2*theta[i][j], list(range(number_of_qubits)), i, number_of_qubits + data_dimensionality - j - 1, target_state=0)
+    
+
+    # Return the final quantum circuit
+    return qc
+
+
+
+def FRQIEncoding_angles(data : Union[list, np.ndarray] , min_val : Optional[float] = None , max_val : Optional[float]= None , method : str = "controlled" ) -> np.ndarray :
+    """
+    Normalizes the given data to the angles (in the range [0, pi/2]) used by the FRQI Encoding.
+
+    Args:
+        data (list or numpy.ndarray): The list or array of values to be encoded.
+        min_val (float, optional): The minimum value of the data. If not provided, it will be calculated from the data. Defaults to None.
+        max_val (float, optional): The maximum value of the data. If not provided, it will be calculated from the data. Defaults to None.
+        method (str, optional): The synthesis method of the circuit ("controlled" or "multiplexor"), both use the same angles. 
+                                Defaults to "controlled".
+
+    Returns:
+        numpy.ndarray: A 2D array with one row per (padded) address and one column per data qubit.
+    """
+    if method not in ("controlled", "multiplexor"):
+        raise ValueError(f"Unknown method: {method}, it must be either 'controlled' or 'multiplexor'")
+
+
     # pad with zeros if needed
     padded_data = pad_with_zeros(np.array(data))
 
@@ -134,39 +197,131 @@ def FRQIEncoding(data : Union[list, np.ndarray] , min_val : Optional[float] = No
     else:
         # Normalize to the range [0, pi/2]
         theta  = (padded_data - min_val) * (np.pi / 2) / (max_val - min_val)
-        
-   
-    number_of_qubits = int ( np.ceil(np.log2(len(padded_data))) )
 
-    data_dimensionality = np.size(padded_data, axis=1) 
+    return theta
+
+
+def FRQIEncoding_angles_batch(dataset : Union[list, np.ndarray] , min_val : Optional[float] = None , max_val : Optional[float]= None , method : str = "controlled" ) -> np.ndarray :
+    """
+    Computes the angles of FRQIEncoding_angles for every sample of a dataset in one vectorized step.
+
+    Args:
+        dataset (list or numpy.ndarray): The samples to be encoded, a 2D array (one value per address) or a 3D array 
+                                         (several values per address) with one sample per row.
+        min_val (float, optional): The minimum value of the data. If not provided, it is calculated for each sample. Defaults to None.
+        max_val (float, optional): The maximum value of the data. If not provided, it is calculated for each sample. Defaults to None.
+        method (str, optional): The synthesis method of the circuit ("controlled" or "multiplexor"), both use the same angles. 
+                                Defaults to "controlled".
+
+    Returns:
+        numpy.ndarray: A 3D array with the angles of each sample, as returned by FRQIEncoding_angles.
+    """
+    if method not in ("controlled", "multiplexor"):
+        raise ValueError(f"Unknown method: {method}, it must be either 'controlled' or 'multiplexor'")
+
+    dataset = np.array(dataset)
+    if np.ndim(dataset) not in (2, 3):
+        raise TypeError("Input dataset must be 2D or 3D (one sample per row)")
+
+    # pad with zeros if needed, like pad_with_zeros does for each sample (on every axis of the sample)
+    number_of_values = np.size(dataset, axis=1)
+    number_of_zeros = int(2 ** np.ceil(max(np.log2(number_of_values),1)) - number_of_values)
+    padded_data = np.pad(dataset, [(0, 0)] + [(0, number_of_zeros)] * (np.ndim(dataset) - 1), mode='constant')
+
+    # One value per address is a single data qubit
+    if np.ndim(padded_data) == 2:
+        padded_data = padded_data[:, :, np.newaxis]
+
+    # Calculate the min_val and max_val of each sample if they are None, otherwise use the provided values
+    min_vals = np.min(padded_data, axis=(1, 2), keepdims=True) if min_val is None else np.full((len(padded_data), 1, 1), min_val)
+    max_vals = np.max(padded_data, axis=(1, 2), keepdims=True) if max_val is None else np.full((len(padded_data), 1, 1), max_val)
+
+    # Normalize to the range [0, pi/2], the samples with min_val == max_val are all zeros
+    with np.errstate(divide="ignore", invalid="ignore"):
+        theta : np.ndarray = np.where(min_vals == max_vals, 0, (padded_data - min_vals) * (np.pi / 2) / (max_vals - min_vals))
+
+    return theta
+
+
+def FRQIEncoding_template(number_of_addresses : int , data_dimensionality : int = 1 , method : str = "controlled" ) -> QuantumCircuit :
+    """
+    Builds the FRQI Encoding circuit with the angles as parameters, 
+    the gate layout only depends on the number of addresses and values per address.
+
+    Args:
+        number_of_addresses (int): The number of (padded) addresses, a power of 2.
+        data_dimensionality (int, optional): The number of values per address. Defaults to 1.
+        method (str, optional): The synthesis method of the circuit ("controlled" or "multiplexor"). Defaults to "controlled".
+
+    Returns:
+        QuantumCircuit: The circuit with the parameters θ[0], ..., θ[number_of_addresses * data_dimensionality - 1],
+                        bind them with the flattened output of FRQIEncoding_angles.
+    """
+    theta = ParameterVector("θ", number_of_addresses * data_dimensionality)
+   
+    number_of_qubits = int ( np.ceil(np.log2(number_of_addresses)) )
 
     # Indices of data
     qr1 = QuantumRegister(number_of_qubits, "a") 
     # Data
     qr2 = QuantumRegister(data_dimensionality, "d")    
 
-    
     # Create a quantum circuit with multipule qubits
     qc = QuantumCircuit(qr1 ,qr2 )
 
-    
     # Create a superposition for all the addresses
     qc.h(range(number_of_qubits))
 
+    if method == "multiplexor":
+        for j in range(data_dimensionality):
+            angles = [2*theta[i * data_dimensionality + j] for i in range(number_of_addresses)]
+            uniformly_controlled_ry(qc, angles, list(range(number_of_qubits)), number_of_qubits + data_dimensionality - j - 1)
+        return qc
+    elif method != "controlled":
+        raise ValueError(f"Unknown method: {method}, it must be either 'controlled' or 'multiplexor'")
 
     # Set up the data 
-    for i in range(len(padded_data)):
+    for i in range(number_of_addresses):
         for j in range(data_dimensionality):      
                   
             qubits_ids = list(range(number_of_qubits)) + [number_of_qubits + data_dimensionality - j - 1]
 
-            qc.append(RYGate(2*theta[i][j]).control(num_ctrl_qubits=number_of_qubits, ctrl_state=i), qubits_ids )
-    
+            qc.append(controlled_ry(2*theta[i * data_dimensionality + j], number_of_qubits, i), qubits_ids )
 
-    # Return the final quantum circuit
     return qc
 
 
+def FRQIEncoding_statevector(data : Union[list, np.ndarray] , min_val : Optional[float] = None , max_val : Optional[float]= None , method : str = "controlled" ) -> np.ndarray :
+    """
+    Computes the statevector prepared by the FRQI Encoding of the given data,
+    without building or simulating the quantum circuit.
+
+    Args:
+        data (list or numpy.ndarray): The list or array of values to be encoded.
+        min_val (float, optional): The minimum value of the data. If not provided, it will be calculated from the data. Defaults to None.
+        max_val (float, optional): The maximum value of the data. If not provided, it will be calculated from the data. Defaults to None.
+        method (str, optional): The synthesis method of the circuit, it does not change the state. Defaults to "controlled".
+
+    Returns:
+        numpy.ndarray: The statevector of the FRQI Encoding of the data.
+    """
+    theta = FRQIEncoding_angles(data, min_val, max_val, method)
+
+    number_of_addresses , data_dimensionality = np.shape(theta)
+
+    # Build the state of the data qubits for every address at once,
+    # the first column is stored in the most significant data qubit
+    data_states = np.ones((number_of_addresses, 1))
+    for j in range(data_dimensionality):
+        qubit_states = np.stack([np.cos(theta[:, j]), np.sin(theta[:, j])], axis=1)
+        data_states = (data_states[:, :, np.newaxis] * qubit_states[:, np.newaxis, :]).reshape(number_of_addresses, -1)
+
+    # The address qubits are the least significant ones and are in a uniform superposition
+    statevector : np.ndarray = data_states.T.reshape(-1) / np.sqrt(number_of_addresses) + 0j
+
+    return statevector
+
+
 
     
 if __name__=="__main__": 
@@ -0,0 +1,166 @@
+import numpy as np
+from qiskit import QuantumCircuit
+
+from Utilities.gate_factory import controlled_ry
+
+# Typing stuff
+from typing import Any, Optional, Union
+
+
+def SparseAmplitudeEncoding(data : Union[tuple, Any] , number_of_qubits : Optional[int] = None ) -> QuantumCircuit:
+    """
+    Encodes the given sparse data into a quantum circuit using Amplitude Encoding (QPIE).
+
+    The qubits are prepared from the most significant to the least significant one. For every state (prefix)
+    of the already prepared qubits a controlled RY splits the norm of the amplitudes with that prefix between
+    the next qubit being 0 and 1. Prefixes with zero norm and rotations with a zero angle are skipped,
+    so the circuit has at most n gates per non-zero value, instead of 2^n-1.
+
+    Args:
+        data (tuple or scipy.sparse): Either a tuple (indices, values) with the indices and the real values
+                                      of the non-zero elements, or a scipy.sparse matrix/array with a single row.
+        number_of_qubits (int, optional): The number of qubits of the circuit. If not provided, the minimum
+                                          number of qubits that fit all the indices (and at least 1) is used.
+
+    Returns:
+        QuantumCircuit: The quantum circuit representing the Amplitude Encoding of the data.
+
+    Examples:
+        >>> data = ([1, 6], [0.6, -0.8])  # Equivalent to [0, 0.6, 0, 0, 0, 0, -0.8, 0]
+        >>> qc = SparseAmplitudeEncoding(data)
+        >>> print(qc)
+                                    ┌───────┐┌────────┐
+        q_0: ───────────────────────┤ Ry(π) ├┤ Ry(2π) ├
+                           ┌───────┐└───┬───┘└───┬────┘
+        q_1: ──────────────┤ Ry(π) ├────o────────■─────
+             ┌────────────┐└───┬───┘    │        │
+        q_2: ┤ Ry(1.8546) ├────■────────o────────■─────
+             └────────────┘
+    """
+    indices , values , number_of_qubits = sparse_indices_values(data, number_of_qubits)
+
+    # Normalize data
+    values = values / np.sqrt(np.sum(np.abs(values)**2))
+
+    # Create a quantum circuit with multipule qubits
+    qc = QuantumCircuit(number_of_qubits)
+
+    for k in range(number_of_qubits):
+        target_qubit = number_of_qubits - 1 - k
+        control_qubits = list(range(target_qubit + 1, number_of_qubits))
+
+        # Group the non-zero values by the state of the already prepared qubits (prefix)
+        prefixes , groups = np.unique(indices >> (target_qubit + 1), return_inverse=True)
+        target_bits = (indices >> target_qubit) & 1
+
+        if target_qubit == 0:
+            # Each prefix has at most two values, their signs are set here
+            amplitude_0 = np.bincount(groups, weights=values * (target_bits == 0), minlength=len(prefixes))
+            amplitude_1 = np.bincount(groups, weights=values * (target_bits == 1), minlength=len(prefixes))
+            angles = 2 * np.arctan2(amplitude_1, amplitude_0)
+        else:
+            norm_0 = np.sqrt(np.bincount(groups, weights=values**2 * (target_bits == 0), minlength=len(prefixes)))
+            norm_1 = np.sqrt(np.bincount(groups, weights=values**2 * (target_bits == 1), minlength=len(prefixes)))
+            angles = 2 * np.arctan2(norm_1, norm_0)
+
+        for prefix , angle in zip(prefixes, angles):
+            if angle == 0:
+                continue
+            if k == 0:
+                qc.ry(angle, target_qubit)
+            else:
+                multi_ctr_RYGate = controlled_ry(angle, k, prefix)
+                qc.append(multi_ctr_RYGate, control_qubits + [target_qubit])
+
+    # Return the final quantum circuit
+    return qc
+
+
+def SparseAmplitudeEncoding_statevector(data : Union[tuple, Any] , number_of_qubits : Optional[int] = None ) -> np.ndarray:
+    """
+    Computes the statevector prepared by the Sparse Amplitude Encoding of the given data,
+    without building or simulating the quantum circuit.
+
+    Args:
+        data (tuple or scipy.sparse): Either a tuple (indices, values) or a scipy.sparse matrix/array with a single row.
+        number_of_qubits (int, optional): The number of qubits of the circuit.
+
+    Returns:
+        numpy.ndarray: The (dense) statevector of the Amplitude Encoding of the data.
+    """
+    indices , values , number_of_qubits = sparse_indices_values(data, number_of_qubits)
+
+    statevector = np.zeros(2**number_of_qubits, dtype=complex)
+    statevector[indices] = values / np.sqrt(np.sum(np.abs(values)**2))
+
+    return statevector
+
+
+def sparse_indices_values(data : Union[tuple, Any] , number_of_qubits : Optional[int] = None ) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    Extracts the indices and the values of the non-zero elements of sparse data.
+
+    Args:
+        data (tuple or scipy.sparse): Either a tuple (indices, values) or a scipy.sparse matrix/array with a single row.
+        number_of_qubits (int, optional): The number of qubits of the circuit. If not provided, the minimum
+                                          number of qubits that fit all the indices (and at least 1) is used.
+
+    Returns:
+        tuple: The (sorted) indices, their values and the number of qubits.
+    """
+    length : int
+    if hasattr(data, "tocoo"):
+        # A scipy.sparse matrix or array
+        coo = data.tocoo()
+        if coo.ndim == 2 and coo.shape[0] != 1:
+            raise ValueError("Input sparse matrix must have a single row")
+        coo.sum_duplicates()
+        indices = np.asarray(coo.col if coo.ndim == 2 else coo.coords[0], dtype=np.int64)
+        values = np.asarray(coo.data, dtype=float)
+        length = coo.shape[-1]
+    else:
+        indices = np.asarray(data[0], dtype=np.int64)
+        values = np.asarray(data[1], dtype=float)
+        if indices.shape != values.shape or indices.ndim != 1:
+            raise ValueError("Input indices and values must be 1D and of the same length")
+        if np.any(indices < 0):
+            raise ValueError("Input indices must be non-negative")
+        if len(np.unique(indices)) != len(indices):
+            raise ValueError("Input indices must not contain duplicates")
+        length = int(np.max(indices, initial=0)) + 1
+
+    # Keep only the non-zero values
+    non_zero = values != 0
+    indices , values = indices[non_zero] , values[non_zero]
+
+    if len(values) == 0:
+        raise ValueError("Input data must contain at least one non-zero value")
+
+    if number_of_qubits is None:
+        number_of_qubits = max(int(np.ceil(np.log2(length))), 1)
+    elif 2**number_of_qubits < length:
+        raise ValueError("Input number_of_qubits is too small for the length of the data")
+
+    order = np.argsort(indices)
+    return indices[order] , values[order] , number_of_qubits
+
+
+
+if __name__ == "__main__" :
+
+    show_plot = True
+
+    data = ([1, 6], [0.6, -0.8])
+
+    qc = SparseAmplitudeEncoding(data)
+
+    # Print quantum circuit to the console
+    print(qc)
+
+    if show_plot:
+        from qiskit.visualization import circuit_drawer
+        import matplotlib.pyplot as plt
+
+        # Plot the circuit
+        fig = circuit_drawer(qc, output='mpl', style="iqp")
+        plt.show()
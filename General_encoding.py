@@ -1,30 +1,223 @@
 import numpy as np
 from qiskit import transpile  
-from qiskit.visualization import circuit_drawer 
-from qiskit_aer import Aer 
-
-import matplotlib.pyplot as plt
+from functools import lru_cache, partial
+import atexit
+import inspect
+import os
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # Typing stuff
-from typing import Any, Callable, Union, Optional 
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Sized, Union, Optional, Literal, overload
 from qiskit import QuantumCircuit
 from qiskit.result.result import Result
-from qiskit_aer.jobs.aerjob import AerJob
-from qiskit_aer.backends.statevector_simulator import StatevectorSimulator
+
+if TYPE_CHECKING:
+    # Only needed for the annotations, qiskit_aer is imported on first use by `get_backend`
+    from qiskit_aer.jobs.aerjob import AerJob
+    from qiskit_aer.backends.statevector_simulator import StatevectorSimulator
 
 # Custom libraries
-from Encodings.qs_AmplitudeEncoding     import AmplitudeEncoding
-from Encodings.qs_AngleEncoding         import AngleEncoding
-from Encodings.qs_BasisEncoding         import BasisEncoding
-from Encodings.qs_FRQI                  import FRQIEncoding
+from Encodings.qs_AmplitudeEncoding     import AmplitudeEncoding, AmplitudeEncoding_statevector, AmplitudeEncoding_angles, AmplitudeEncoding_template
+from Encodings.qs_AmpQRAM               import AmplitudeQRAM, AmplitudeQRAM_statevector, AmplitudeQRAM_angles, AmplitudeQRAM_template
+from Encodings.qs_AngleEncoding         import AngleEncoding, AngleEncoding_statevector, AngleEncoding_angles, AngleEncoding_template, AngleEncoding_angles_batch
+from Encodings.qs_BasisEncoding         import BasisEncoding, BasisEncoding_statevector
+from Encodings.qs_FRQI                  import FRQIEncoding, FRQIEncoding_statevector, FRQIEncoding_angles, FRQIEncoding_template, FRQIEncoding_angles_batch
+from Encodings.qs_SparseAmplitudeEncoding import SparseAmplitudeEncoding, SparseAmplitudeEncoding_statevector
 
 from Utilities.decorators import get_time
+from Utilities.transpile_cache import TranspileCache
+
+
+# Closed form statevector of each encoding, used by `encode_data(..., statevector_only=True)`
+statevector_functions : dict[Callable[..., QuantumCircuit], Callable[..., np.ndarray]] = {
+    AmplitudeEncoding:  AmplitudeEncoding_statevector,
+    AmplitudeQRAM:      AmplitudeQRAM_statevector,
+    AngleEncoding:      AngleEncoding_statevector,
+    BasisEncoding:      BasisEncoding_statevector,
+    FRQIEncoding:       FRQIEncoding_statevector,
+    SparseAmplitudeEncoding: SparseAmplitudeEncoding_statevector,
+}
+
+# Parameterized templates of the encodings whose gate layout only depends on the size of the data,
+# used by `encode_data(..., use_cache=True)`. For each encoding: the function that computes the
+# parameter values from the data and the function that builds the template from those values
+# (both take the same additional arguments as the encoding function).
+template_functions : dict[Callable[..., QuantumCircuit], tuple[Callable[..., np.ndarray], Callable[..., QuantumCircuit]]] = {
+    AmplitudeEncoding:  (AmplitudeEncoding_angles,  lambda alpha, method="recursive": AmplitudeEncoding_template(int(np.log2(len(alpha) + 1)), method)),
+    AngleEncoding:      (AngleEncoding_angles,      lambda theta, *args, **kwargs: AngleEncoding_template(len(theta))),
+    AmplitudeQRAM:      (AmplitudeQRAM_angles,      lambda alpha, number_of_address_qubits=0: AmplitudeQRAM_template(int(np.log2(np.shape(alpha)[1] + 1)) + number_of_address_qubits, number_of_address_qubits)),
+    FRQIEncoding:       (FRQIEncoding_angles,       lambda theta, min_val=None, max_val=None, method="controlled": FRQIEncoding_template(len(theta), np.shape(theta)[1], method)),
+}
+
+# The options of the encodings that change the gate layout of their templates, the other options (e.g. min_val and max_val)
+# only change the parameter values, so they are not part of the keys of `transpile_cache`
+template_options = ("method", "number_of_address_qubits")
+
+# Vectorized versions of the first functions of `template_functions`, they compute the parameter values of every 
+# sample of a dataset at once, used by `encode_batch(..., use_cache=True)` (the other encodings compute them sample by sample)
+batch_parameter_functions : dict[Callable[..., QuantumCircuit], Callable[..., np.ndarray]] = {
+    AngleEncoding:      AngleEncoding_angles_batch,
+    FRQIEncoding:       FRQIEncoding_angles_batch,
+}
+
+# The environment variable with the directory where `transpile_cache` also stores the templates as QPY files, so
+# that every process started with it (e.g. the workers of a job) transpiles each template only once
+TRANSPILE_CACHE_DIR_ENV = "QS_TRANSPILE_CACHE_DIR"
+
+# Transpiled templates shared by every call with `use_cache=True`, see `configure_transpile_cache`
+transpile_cache = TranspileCache(cache_dir=os.environ.get(TRANSPILE_CACHE_DIR_ENV) or None)
+
+
+@lru_cache(maxsize=None)
+def get_backend(name: str) -> Any:
+    """
+    Get an Aer backend. qiskit_aer is only imported the first time a backend is needed,
+    so that importing this module (e.g. to use `statevector_only=True`) stays fast.
+
+    Parameters:
+        name (str): The name of the backend, e.g. 'qasm_simulator' or 'statevector_simulator'.
+
+    Returns:
+        AerBackend: The backend, shared by every call with the same name.
+    """
+    from qiskit_aer import Aer
+
+    return Aer.get_backend(name)
+
+
+def configure_transpile_cache(cache_dir: Optional[str]) -> None:
+    """
+    Set the directory where `transpile_cache`, the cache of `encode_data(..., use_cache=True)` and 
+    `encode_batch(..., use_cache=True)`, also stores the transpiled templates as QPY files. The templates 
+    stored by other processes in the same directory are loaded instead of being transpiled again.
+    It can also be set for a whole process with the environment variable QS_TRANSPILE_CACHE_DIR.
+
+    Parameters:
+        cache_dir (str): The directory, created if it does not exist. None to only keep the templates in memory.
+    """
+    transpile_cache.set_cache_dir(cache_dir)
+
+
+def get_transpiled_template(encoding_function: Callable[..., QuantumCircuit], 
+                            parameters: np.ndarray, 
+                            *args: Any, 
+                            **kwargs: Any) -> QuantumCircuit:
+    """
+    Get the transpiled template of the encoding for parameters of the given shape and the given options, 
+    it is only transpiled the first time and then taken from `transpile_cache`. Only the shape and the
+    options in `template_options` are part of the key, the template does not depend on the others.
+
+    Parameters:
+        encoding_function (callable): One of the encodings in `template_functions`.
+        parameters (numpy.ndarray): The parameter values of the data to be encoded.
+        *args: Additional positional arguments of the encoding function.
+        **kwargs: Additional keyword arguments of the encoding function.
+
+    Returns:
+        QuantumCircuit: The transpiled template, with unbound parameters.
+    """
+    build_template = template_functions[encoding_function][1]
+
+    # The options in `template_options`, given either as positional or keyword arguments, or their defaults
+    arguments = inspect.signature(encoding_function).bind(parameters, *args, **kwargs)
+    arguments.apply_defaults()
+    options = tuple((name, arguments.arguments[name]) for name in template_options if name in arguments.arguments)
+
+    key = (encoding_function.__module__, encoding_function.__qualname__, np.shape(parameters), options)
+
+    return transpile_cache.get(key, lambda: transpile(build_template(parameters, *args, **kwargs), get_backend('qasm_simulator')))
+
+
+def bind_template(template: QuantumCircuit, parameters: np.ndarray) -> QuantumCircuit:
+    """
+    Bind the parameter values to a (transpiled) template.
+
+    Parameters:
+        template (QuantumCircuit): A template built by one of the functions in `template_functions`.
+        parameters (numpy.ndarray): The parameter values, in the order of the template's ParameterVector once flattened.
+
+    Returns:
+        QuantumCircuit: A new circuit with all the parameters bound.
+    """
+    values = np.ravel(parameters)
+    return template.assign_parameters({parameter: values[parameter.index] for parameter in template.parameters})
+
+
+def get_batch_parameters(dataset: Union[list, np.ndarray], 
+                         encoding_function: Callable[..., QuantumCircuit], 
+                         *args: Any, 
+                         **kwargs: Any) -> np.ndarray:
+    """
+    Compute the parameter values of every sample of a dataset, in one vectorized step for the encodings in 
+    `batch_parameter_functions`.
+
+    Parameters:
+        dataset (array_like): The samples to be encoded, one sample per row.
+        encoding_function (callable): One of the encodings in `template_functions`.
+        *args: Additional positional arguments of the encoding function.
+        **kwargs: Additional keyword arguments of the encoding function.
+
+    Returns:
+        numpy.ndarray: The parameter values of each sample, stacked along the first axis.
+    """
+    if encoding_function in batch_parameter_functions:
+        # The samples are encoded as one array, so they must have the same shape
+        if any(np.shape(data) != np.shape(dataset[0]) for data in dataset):
+            raise ValueError("All the samples of the dataset must be encoded with the same number of qubits")
+        return batch_parameter_functions[encoding_function](dataset, *args, **kwargs)
+
+    parameters_of = template_functions[encoding_function][0]
+    parameters = [parameters_of(data, *args, **kwargs) for data in dataset]
+
+    if any(np.shape(sample_parameters) != np.shape(parameters[0]) for sample_parameters in parameters):
+        raise ValueError("All the samples of the dataset must be encoded with the same number of qubits")
+
+    return np.stack(parameters)
+
+
+def bind_templates(template: QuantumCircuit, parameters: np.ndarray) -> list[QuantumCircuit]:
+    """
+    Bind the parameter values of several samples to a (transpiled) template, see `bind_template`.
+
+    Parameters:
+        template (QuantumCircuit): A template built by one of the functions in `template_functions`.
+        parameters (numpy.ndarray): The parameter values of each sample, stacked along the first axis.
+
+    Returns:
+        list: A new circuit with all the parameters bound for each sample.
+    """
+    # The values of each parameter for all the samples
+    values = np.reshape(parameters, (len(parameters), -1))
+    template_parameters = list(template.parameters)
+    columns = [values[:, parameter.index] for parameter in template_parameters]
+
+    return [template.assign_parameters(dict(zip(template_parameters, sample_values))) for sample_values in zip(*columns)]
+
+
+@overload
+def encode_data(data: Union[list, np.ndarray], 
+                encoding_function: Callable[[Union[list, np.ndarray]], QuantumCircuit],
+                *args: Any, 
+                statevector_only: Literal[False] = ...,
+                use_cache: bool = ...,
+                **kwargs: Any) -> tuple[QuantumCircuit, Result]: ...
+@overload
+def encode_data(data: Union[list, np.ndarray], 
+                encoding_function: Callable[[Union[list, np.ndarray]], QuantumCircuit],
+                *args: Any, 
+                statevector_only: Literal[True],
+                use_cache: bool = ...,
+                **kwargs: Any) -> np.ndarray: ...
 
 # @get_time
 def encode_data(data: Union[list, np.ndarray], 
                 encoding_function: Callable[[Union[list, np.ndarray]], QuantumCircuit],
-                *args: tuple, 
-                **kwargs: dict[str, Any]) -> tuple[QuantumCircuit, Result]:
+                *args: Any, 
+                statevector_only: bool = False,
+                use_cache: bool = False,
+                **kwargs: Any) -> Union[tuple[QuantumCircuit, Result], np.ndarray]:
     """
     Encode the given data using the specified encoding function.
 
@@ -33,29 +226,334 @@ def encode_data(data: Union[list, np.ndarray],
         encoding_function (callable): A function that takes the data and additional arguments,
                                       and returns the QuantumCircuit.
         *args: Additional positional arguments to be passed to the encoding function.
+        statevector_only (bool, optional): If True, the statevector is computed directly with NumPy from the 
+                                           closed form of the encoding, without building, transpiling or 
+                                           simulating any circuit. Only available for the implemented encodings.
+                                           Defaults to False.
+        use_cache (bool, optional): If True and the encoding has a template in `template_functions`, the transpiled 
+                                    template for this data size is taken from `transpile_cache` (transpiled only once) 
+                                    and only the parameter values of the data are bound. Defaults to False.
         **kwargs: Additional keyword arguments to be passed to the encoding function.
 
     Returns:
         tuple: A tuple containing the encoded QuantumCircuit and the result of simulation.
+               If use_cache is True, the circuit is the bound transpiled template.
+               If statevector_only is True, only the statevector (numpy.ndarray) is returned.
     """
     # Assuming `data` is already prepared and `encoding_function` is implemented as per requirements
 
+    if statevector_only:
+        if encoding_function not in statevector_functions:
+            raise ValueError(f"No closed form statevector is available for the encoding function: {encoding_function.__name__}")
+        return statevector_functions[encoding_function](data, *args, **kwargs)
 
-    # Apply the custom encoding function
-    qc = encoding_function(data, *args, **kwargs)
 
-    # Transpile the circuit for the backend
-    transpiled_circuit = transpile(qc, Aer.get_backend('qasm_simulator'))
+    if use_cache and encoding_function in template_functions:
+        # Only bind the parameters of the data to the cached transpiled template 
+        parameters = template_functions[encoding_function][0](data, *args, **kwargs)
+        qc = bind_template(get_transpiled_template(encoding_function, parameters, *args, **kwargs), parameters)
+        transpiled_circuit = qc
+    else:
+        # Apply the custom encoding function
+        qc = encoding_function(data, *args, **kwargs)
+
+        # Transpile the circuit for the backend
+        transpiled_circuit = transpile(qc, get_backend('qasm_simulator'))
 
     # Simulate the transpiled circuit
-    backend : StatevectorSimulator = Aer.get_backend('statevector_simulator')
+    backend : 'StatevectorSimulator' = get_backend('statevector_simulator')
     #  AerSimulator(method="statevector")
-    job : AerJob = backend.run(transpiled_circuit)
+    job : 'AerJob' = backend.run(transpiled_circuit)
     result : Result = job.result()    
 
     return qc , result
 
 
+# Process pool shared by every call of `encode_batch` with `workers` > 1, and its number of workers
+process_pool : Optional[ProcessPoolExecutor] = None
+process_pool_workers : int = 0
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Get the shared process pool, it is only created on the first call (or when the number of workers changes)
+    and then reused, so the start-up cost of the worker processes is paid once.
+
+    Parameters:
+        workers (int): The number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: The shared process pool.
+    """
+    global process_pool, process_pool_workers
+
+    if process_pool is None or process_pool_workers != workers:
+        shutdown_process_pool()
+        process_pool = ProcessPoolExecutor(max_workers=workers)
+        process_pool_workers = workers
+
+    return process_pool
+
+
+def shutdown_process_pool() -> None:
+    """
+    Shut down the shared process pool, if there is one. A new pool is created by the next call that needs it.
+    """
+    global process_pool, process_pool_workers
+
+    if process_pool is not None:
+        process_pool.shutdown(cancel_futures=True)
+        process_pool = None
+        process_pool_workers = 0
+
+
+atexit.register(shutdown_process_pool)
+
+
+def build_and_transpile(data: Union[list, np.ndarray], 
+                        encoding_function: Callable[..., QuantumCircuit],
+                        args: tuple, 
+                        kwargs: dict[str, Any]) -> tuple[QuantumCircuit, QuantumCircuit]:
+    """
+    Build the circuit of one sample and transpile it, this is the task of the workers of `encode_batch`.
+
+    Returns:
+        tuple: The encoded QuantumCircuit and the transpiled one.
+    """
+    qc = encoding_function(data, *args, **kwargs)
+    return qc , transpile(qc, get_backend('qasm_simulator'))
+
+
+def encode_batch(dataset: Union[list, np.ndarray], 
+                 encoding_function: Callable[[Union[list, np.ndarray]], QuantumCircuit],
+                 *args: Any, 
+                 workers: int = 1,
+                 use_cache: bool = False,
+                 **kwargs: Any) -> tuple[list[QuantumCircuit], np.ndarray]:
+    """
+    Encode every sample of a dataset and simulate all of them in a single Aer job.
+
+    All the circuits are built first, transpiled together as one list and submitted
+    to the simulator as one multi-experiment job, so the transpile and job overhead
+    is paid once for the whole dataset instead of once per sample.
+
+    Parameters:
+        dataset (array_like): The samples to be encoded, one sample per row. 
+                              Every sample must lead to a circuit with the same number of qubits.
+        encoding_function (callable): A function that takes a sample and additional arguments,
+                                      and returns the QuantumCircuit.
+        *args: Additional positional arguments to be passed to the encoding function.
+        workers (int, optional): The number of processes that build and transpile the circuits. Defaults to 1
+                                 (in this process). With more workers, a shared process pool is used, so the
+                                 encoding function and its arguments must be picklable (e.g. not a lambda).
+        use_cache (bool, optional): If True, and the encoding has a template in `template_functions`, the parameters of
+                                    all the samples are computed at once (see `get_batch_parameters`), the transpiled 
+                                    template is taken from `transpile_cache` and simulated once with every set of parameters 
+                                    (Aer parameter binds), and the circuits are the bound templates. Defaults to False.
+        **kwargs: Additional keyword arguments to be passed to the encoding function.
+
+    Returns:
+        tuple: A tuple containing the list of encoded QuantumCircuits and a 2D NumPy array 
+               with the statevector of each sample as a row.
+    """
+    if len(dataset) == 0:
+        raise ValueError("Input dataset must contain at least one sample")
+    if workers < 1:
+        raise ValueError("Input workers must be at least 1")
+
+    if use_cache and encoding_function in template_functions:
+        return encode_batch_template(dataset, encoding_function, *args, **kwargs)
+
+    circuits : list[QuantumCircuit]
+    transpiled_circuits : list[QuantumCircuit]
+
+    if workers == 1:
+        # Apply the custom encoding function to every sample
+        circuits = [encoding_function(data, *args, **kwargs) for data in dataset]
+    else:
+        # Build and transpile the circuits in the worker processes, `map` keeps the order of the samples
+        # and raises the first error of the workers here
+        task = partial(build_and_transpile, encoding_function=encoding_function, args=args, kwargs=kwargs)
+        chunk_size = max(1, len(dataset) // (4 * workers))
+        try:
+            circuits , transpiled_circuits = map(list, zip(*get_process_pool(workers).map(task, dataset, chunksize=chunk_size)))
+        except BrokenProcessPool:
+            # A worker died, the next call starts a new pool
+            shutdown_process_pool()
+            raise
+
+    if any(qc.num_qubits != circuits[0].num_qubits for qc in circuits):
+        raise ValueError("All the samples of the dataset must be encoded with the same number of qubits")
+
+    if workers == 1:
+        # Transpile all the circuits for the backend at once
+        transpiled_circuits = transpile(circuits, get_backend('qasm_simulator'))
+
+    # Simulate all the transpiled circuits as one job
+    backend : 'StatevectorSimulator' = get_backend('statevector_simulator')
+    job : 'AerJob' = backend.run(transpiled_circuits)
+    result : Result = job.result()
+
+    statevectors = np.stack([result.get_statevector(i).data for i in range(len(circuits))])
+
+    return circuits , statevectors
+
+def encode_batch_template(dataset: Union[list, np.ndarray], 
+                          encoding_function: Callable[..., QuantumCircuit],
+                          *args: Any, 
+                          **kwargs: Any) -> tuple[list[QuantumCircuit], np.ndarray]:
+    """
+    Encode every sample of a dataset with the transpiled template of the encoding, this is `encode_batch(..., use_cache=True)`.
+
+    Returns:
+        tuple: The bound templates and a 2D NumPy array with the statevector of each sample as a row.
+    """
+    parameters = get_batch_parameters(dataset, encoding_function, *args, **kwargs)
+    template = get_transpiled_template(encoding_function, parameters[0], *args, **kwargs)
+
+    # One experiment for each sample, with the values of every parameter for all the samples
+    values = np.reshape(parameters, (len(parameters), -1))
+    parameter_binds = [{parameter: values[:, parameter.index].tolist() for parameter in template.parameters}]
+
+    backend : 'StatevectorSimulator' = get_backend('statevector_simulator')
+    job : 'AerJob' = backend.run(template, parameter_binds=parameter_binds)
+    result : Result = job.result()
+
+    statevectors = np.stack([result.get_statevector(i).data for i in range(len(parameters))])
+
+    return bind_templates(template, parameters) , statevectors
+
+
+def load_samples(source: Union[Iterable, str, os.PathLike]) -> Iterable:
+    """
+    Get the samples of a streaming source: a `.npy` file is memory-mapped (one sample per row),
+    so its rows are only read from the disk when they are used. Any other source is returned as it is.
+
+    Parameters:
+        source (iterable or path): An iterable of samples, or the path of a `.npy` file.
+
+    Returns:
+        iterable: The samples.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        samples : np.ndarray = np.load(source, mmap_mode="r")
+        return samples
+    return source
+
+
+def encode_stream(source: Union[Iterable, str, os.PathLike], 
+                  encoding_function: Callable[[Union[list, np.ndarray]], QuantumCircuit],
+                  *args: Any, 
+                  chunk_size: int = 64,
+                  workers: int = 1,
+                  statevector_only: bool = False,
+                  **kwargs: Any) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Encode the samples of a (possibly larger than memory) dataset in chunks, yielding their statevectors one by one.
+
+    Only one chunk of samples, circuits and results is kept in memory at a time, so the peak memory
+    depends on `chunk_size` and not on the size of the dataset. Each chunk is encoded with `encode_batch`
+    (a single Aer job), or with the closed form of the encoding if `statevector_only` is True.
+
+    Parameters:
+        source (iterable or path): An iterable of samples (e.g. a generator), or the path of a `.npy` file
+                                   that is memory-mapped with one sample per row.
+        encoding_function (callable): A function that takes a sample and additional arguments,
+                                      and returns the QuantumCircuit.
+        *args: Additional positional arguments to be passed to the encoding function.
+        chunk_size (int, optional): The number of samples encoded together. Defaults to 64.
+        workers (int, optional): The number of processes that build and transpile the circuits, see `encode_batch`.
+        statevector_only (bool, optional): If True, the statevectors are computed from the closed form of the encoding.
+        **kwargs: Additional keyword arguments to be passed to the encoding function.
+
+    Yields:
+        tuple: The index of the sample in the source and its statevector.
+    """
+    if chunk_size < 1:
+        raise ValueError("Input chunk_size must be at least 1")
+
+    samples = iter(load_samples(source))
+    index = 0
+
+    while True:
+        chunk = list(islice(samples, chunk_size))
+        if len(chunk) == 0:
+            return
+
+        statevectors : Union[list[np.ndarray], np.ndarray]
+        if statevector_only:
+            statevectors = [encode_data(data, encoding_function, *args, statevector_only=True, **kwargs) for data in chunk]
+        else:
+            _, statevectors = encode_batch(chunk, encoding_function, *args, workers=workers, **kwargs)
+
+        for statevector in statevectors:
+            yield index , statevector
+            index += 1
+
+
+def encode_to_memmap(source: Union[Iterable, str, os.PathLike], 
+                     output_path: Union[str, os.PathLike],
+                     encoding_function: Callable[[Union[list, np.ndarray]], QuantumCircuit],
+                     *args: Any, 
+                     number_of_samples: Optional[int] = None,
+                     chunk_size: int = 64,
+                     workers: int = 1,
+                     statevector_only: bool = False,
+                     **kwargs: Any) -> np.memmap:
+    """
+    Encode the samples of a (possibly larger than memory) dataset with `encode_stream` and write their 
+    statevectors, as rows, into a memory-mapped `.npy` file that is flushed after every chunk.
+
+    Parameters:
+        source (iterable or path): An iterable of samples, or the path of a `.npy` file with one sample per row.
+        output_path (path): The path of the `.npy` file that is created for the statevectors.
+        encoding_function (callable): A function that takes a sample and additional arguments,
+                                      and returns the QuantumCircuit.
+        *args: Additional positional arguments to be passed to the encoding function.
+        number_of_samples (int, optional): The number of samples, only needed if the source has no length (e.g. a generator).
+        chunk_size (int, optional): The number of samples encoded together. Defaults to 64.
+        workers (int, optional): The number of processes that build and transpile the circuits, see `encode_batch`.
+        statevector_only (bool, optional): If True, the statevectors are computed from the closed form of the encoding.
+        **kwargs: Additional keyword arguments to be passed to the encoding function.
+
+    Returns:
+        numpy.memmap: The statevectors of the samples, one per row, backed by the output file.
+    """
+    samples = load_samples(source)
+
+    if number_of_samples is None:
+        if not isinstance(samples, Sized):
+            raise ValueError("Input number_of_samples must be given for a source without a length")
+        number_of_samples = len(samples)
+
+    output : Optional[np.memmap] = None
+    index = -1
+
+    for index , statevector in encode_stream(samples, encoding_function, *args, chunk_size=chunk_size, workers=workers,
+                                             statevector_only=statevector_only, **kwargs):
+        if output is None:
+            # The size of the statevectors is only known after the first sample
+            output = np.lib.format.open_memmap(output_path, mode="w+", dtype=complex, shape=(number_of_samples, len(statevector)))
+
+        if index >= number_of_samples:
+            raise ValueError("The source has more samples than number_of_samples")
+        if len(statevector) != output.shape[1]:
+            raise ValueError("All the samples of the dataset must be encoded with the same number of qubits")
+
+        output[index] = statevector
+        if (index + 1) % chunk_size == 0:
+            output.flush()
+
+    if output is None:
+        raise ValueError("Input source must contain at least one sample")
+    if index + 1 != number_of_samples:
+        raise ValueError("The source has fewer samples than number_of_samples")
+
+    output.flush()
+    return output
+
+
+
  
 if __name__ == "__main__" : 
 
@@ -136,6 +634,9 @@ if __name__ == "__main__" :
 
 
     if show_plot:
+        from qiskit.visualization import circuit_drawer 
+        import matplotlib.pyplot as plt
+
         # # Print the circuit in the console
         # print(qc.draw())
 
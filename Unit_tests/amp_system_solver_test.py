@@ -77,6 +77,35 @@ def test_solve_spherical_angles_radomized() -> None :
             verify_solution(c,alpha)
 
 
+def test_solve_spherical_angles_batch() -> None :
+
+    batch_size = 50
+    for system_size in [1, 2, 3, 8, 16, 33]:
+        c = np.random.rand(batch_size, system_size) - np.random.rand(batch_size, 1)
+        # Some rows with zero tails and some with zeros in between
+        c[::3, system_size // 2:] = 0
+        c[1::3][np.random.rand(len(c[1::3]), system_size) < 0.5] = 0
+        c[:, 0] += np.all(c == 0, axis=1)
+        c = c / np.sqrt(np.sum(np.abs(c)**2, axis=1, keepdims=True))
+
+        alpha = solve_spherical_angles(c)
+        assert alpha.shape == (batch_size, max(system_size - 1, 1))
+        for i in range(batch_size):
+            verify_solution(c[i], alpha[i])
+            assert np.array_equal(alpha[i], solve_spherical_angles(c[i]))
+
+
+def test_solve_spherical_angles_zero_tail() -> None :
+    
+    c = np.array([-1, 0, 0, 0, -5, 0, 0, 0])
+    c = c / np.sqrt(sum(np.abs(c)**2))
+    alpha = solve_spherical_angles(c)
+    verify_solution(c, alpha)
+    # The angles of the zero tail are left as zeros
+    assert np.all(alpha[5:] == 0)
+
+
+
 if __name__ == "__main__" : 
     
    
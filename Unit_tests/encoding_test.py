@@ -11,23 +11,33 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))  # Get the directory of
 sys.path.append(os.path.dirname(SCRIPT_DIR))  # Add the parent directory to the Python path
 
 import time
+import subprocess
 # 
 import numpy as np
-from typing import Callable, Optional, Union
+from typing import Any, Callable, Optional, Union
+from qiskit import QuantumCircuit
+from qiskit.circuit import ParameterVector
+from qiskit.circuit.library import MCXGate
+from qiskit.quantum_info import Statevector
 from qiskit.result.result import Result
 
 
 import pytest
 
 # Custom libraries
-from General_encoding import encode_data
+from General_encoding import encode_data, encode_batch, encode_stream, encode_to_memmap, transpile_cache, configure_transpile_cache, get_process_pool, shutdown_process_pool
 
 from Utilities.utils import pad_with_zeros
+from Utilities.pruning import PRUNE_TOLERANCE, append_pruned_ry, record_pruning
+from Utilities.gate_factory import controlled_x
 
-from Encodings.qs_AmplitudeEncoding   import AmplitudeEncoding
+from Encodings.qs_AmplitudeEncoding   import AmplitudeEncoding, AmplitudeEncoding_angles, circuit_maker_amplitude_encoding, number_of_amplitude_encoding_gates
 from Encodings.qs_AngleEncoding                import AngleEncoding
 from Encodings.qs_BasisEncoding           import BasisEncoding
-from Encodings.qs_BasisEncoding           import convert_to_bin
+from Encodings.qs_BasisEncoding           import convert_to_bin, convert_to_bit_matrix, bin_str_to_hex_str
+from Encodings.qs_AmpQRAM                 import AmplitudeQRAM, AmplitudeQRAM_statevector, AmplitudeQRAM_angles, AmplitudeQRAM_template
+from Encodings.qs_FRQI                    import FRQIEncoding, FRQIEncoding_statevector, FRQIEncoding_angles
+from Encodings.qs_SparseAmplitudeEncoding import SparseAmplitudeEncoding
 
 TOLERANCE = 1e-6
 
@@ -180,6 +190,487 @@ def test_Encodings_multiple_cases(encoding_function: Callable , expected_stateve
         assert np.allclose(state_vector, expected_statevector, atol=TOLERANCE)
 
 
+def test_bit_matrix() -> None:
+    cases : list[Union[list, np.ndarray]] = [[0], [1, 2, 3], [-3, -1, 3, 2], [-4, 3], [1.0, 255.0], np.random.randint(-2**20, 2**20, size=100)]
+    for data in cases:
+        bits , bit_depth = convert_to_bit_matrix(data)
+        # The same bits as np.binary_repr
+        expected_bit_depth = len(np.binary_repr(int(max(map(abs, data))))) + (min(data) < 0)
+        assert bit_depth == expected_bit_depth
+        assert ["".join(map(str, row)) for row in bits] == [np.binary_repr(int(num), width=bit_depth) for num in data]
+        assert convert_to_bin(data) == ([np.binary_repr(int(num), width=bit_depth) for num in data], bit_depth)
+
+    with pytest.raises(ValueError):
+        convert_to_bit_matrix([1, 2.5])
+    with pytest.raises(ValueError):
+        convert_to_bit_matrix(np.array([1, np.nan]))
+
+    assert bin_str_to_hex_str("10") == "2"
+    assert bin_str_to_hex_str("1101") == "d"
+    assert bin_str_to_hex_str("110101") == "d1"
+    assert bin_str_to_hex_str("1010101111110000") == "abf0"
+
+
+def test_BasisEncoding_direct() -> None:
+    data = np.random.randint(-64, 64, size=32)
+    qc = BasisEncoding(data, use_Espresso=False)
+
+    # The same gates as a gate per bit appended with QuantumCircuit.append
+    bin_data , bit_depth = convert_to_bin(data)
+    expected_qc = QuantumCircuit(*qc.qregs)
+    expected_qc.h(range(5))
+    for i , element in enumerate(bin_data):
+        for j , bit in enumerate(element):
+            if bit == "1":
+                expected_qc.append(MCXGate(num_ctrl_qubits=5, ctrl_state=i), list(range(5)) + [5 + bit_depth - j - 1])
+    assert qc == expected_qc
+
+    # The bits of an address share its gate
+    assert len({id(instruction.operation) for instruction in qc.data[5:]}) == len({i for i, element in enumerate(bin_data) if "1" in element})
+
+
+@pytest.mark.parametrize("encoding_function,expected_statevector_gen,data_type", 
+                         [(AmplitudeEncoding, Amplitude_Expected_statevector,DataType.ANALOG),
+                          (AngleEncoding, AngleEncoding_Expected_statevector,DataType.ANALOG),
+                          (BasisEncoding, BasisEncoding_Expected_statevector,DataType.DIGITAL)])
+def test_encode_batch(encoding_function: Callable , expected_statevector_gen: Callable , data_type: DataType) -> None:
+    
+    dataset : np.ndarray
+    if data_type == DataType.ANALOG:
+        dataset = np.random.uniform(low=-16, high=15, size=(8, 4))
+    elif data_type == DataType.DIGITAL:
+        dataset = np.random.randint(low=-16, high=15, size=(8, 4))
+        # Same bit depth for every sample so that all the circuits have the same number of qubits
+        dataset[:, 0] = -16
+
+    circuits, state_vectors = encode_batch(dataset, encoding_function)
+
+    assert len(circuits) == len(dataset)
+    assert state_vectors.shape[0] == len(dataset)
+    for data, state_vector in zip(dataset, state_vectors):
+        assert np.allclose(state_vector, expected_statevector_gen(data), atol=TOLERANCE)
+
+    with pytest.raises(ValueError):
+        encode_batch([], encoding_function)
+
+    # Samples that need circuits of different widths
+    ragged_dataset = [[1, 2, 3, 4], [1, 2]]
+    for use_cache in [False, True]:
+        with pytest.raises(ValueError, match="same number of qubits"):
+            encode_batch(ragged_dataset, encoding_function, use_cache=use_cache)
+
+
+@pytest.mark.parametrize("encoding_function,kwargs", 
+                         [(AmplitudeEncoding, {}),
+                          (AmplitudeQRAM, {'number_of_address_qubits': 1}),
+                          (AngleEncoding, {}),
+                          (AngleEncoding, {'min_val': -16, 'max_val': 15}),
+                          (FRQIEncoding, {}),
+                          (FRQIEncoding, {'min_val': -16, 'max_val': 15, 'method': 'multiplexor'})])
+def test_encode_batch_use_cache(encoding_function: Callable , kwargs: dict) -> None:
+
+    dataset = np.random.uniform(low=-16, high=15, size=(8, 4))
+
+    circuits, state_vectors = encode_batch(dataset, encoding_function, **kwargs)
+    cached_circuits, cached_state_vectors = encode_batch(dataset, encoding_function, use_cache=True, **kwargs)
+
+    # The same states, from one template bound to the parameters of each sample
+    assert np.allclose(cached_state_vectors, state_vectors, atol=TOLERANCE)
+    assert len(cached_circuits) == len(dataset)
+    assert all(qc.num_parameters == 0 for qc in cached_circuits)
+    assert np.allclose(encode_data(dataset[3], encoding_function, **kwargs)[1].get_statevector().data, 
+                       Statevector(cached_circuits[3]).data, atol=TOLERANCE)
+
+
+def test_encode_batch_workers() -> None:
+
+    dataset = np.random.uniform(low=-16, high=15, size=(8, 4))
+
+    encoding_functions : list[Callable] = [AmplitudeQRAM, FRQIEncoding]
+    for encoding_function in encoding_functions:
+        kwargs : dict[str, Any] = {'number_of_address_qubits': 1} if encoding_function == AmplitudeQRAM else {}
+        circuits, state_vectors = encode_batch(dataset, encoding_function, **kwargs)
+        parallel_circuits, parallel_state_vectors = encode_batch(dataset, encoding_function, workers=2, **kwargs)
+
+        # Same results, in the same order
+        assert [qc.num_qubits for qc in parallel_circuits] == [qc.num_qubits for qc in circuits]
+        assert np.allclose(parallel_state_vectors, state_vectors, atol=TOLERANCE)
+
+    # The pool is reused across calls
+    assert get_process_pool(2) is get_process_pool(2)
+
+    # The errors of the workers are raised, and the pool can still be used afterwards
+    with pytest.raises(ValueError):
+        encode_batch([[1, 2, 3, 4], [1, 2]], AmplitudeQRAM, workers=2, number_of_address_qubits=1)
+    _, parallel_state_vectors = encode_batch(dataset, FRQIEncoding, workers=2)
+    assert np.allclose(parallel_state_vectors, state_vectors, atol=TOLERANCE)
+
+    with pytest.raises(ValueError):
+        encode_batch(dataset, FRQIEncoding, workers=0)
+
+    shutdown_process_pool()
+
+
+def test_encode_stream(tmp_path: Any) -> None:
+
+    dataset = np.random.uniform(low=-16, high=15, size=(10, 4))
+    _, state_vectors = encode_batch(dataset, AngleEncoding)
+
+    # A generator, encoded in chunks that do not divide the number of samples
+    stream = encode_stream((data for data in dataset), AngleEncoding, chunk_size=3)
+    indices, streamed_state_vectors = zip(*stream)
+    assert list(indices) == list(range(len(dataset)))
+    assert np.allclose(np.stack(streamed_state_vectors), state_vectors, atol=TOLERANCE)
+
+    # A memory-mapped .npy file, with the closed form statevectors
+    input_path = tmp_path / "dataset.npy"
+    np.save(input_path, dataset)
+    for index, state_vector in encode_stream(input_path, AngleEncoding, chunk_size=4, statevector_only=True):
+        assert np.allclose(state_vector, state_vectors[index], atol=TOLERANCE)
+
+    # Written into a memory-mapped output file
+    output_path = tmp_path / "statevectors.npy"
+    output = encode_to_memmap(input_path, output_path, AngleEncoding, chunk_size=4)
+    assert np.allclose(output, state_vectors, atol=TOLERANCE)
+    assert np.allclose(np.load(output_path), state_vectors, atol=TOLERANCE)
+
+    with pytest.raises(ValueError):
+        encode_to_memmap((data for data in dataset), output_path, AngleEncoding)
+    with pytest.raises(ValueError):
+        encode_to_memmap((data for data in dataset), output_path, AngleEncoding, number_of_samples=len(dataset) + 1)
+    with pytest.raises(ValueError):
+        next(encode_stream(dataset, AngleEncoding, chunk_size=0))
+
+
+
+
+
+@pytest.mark.parametrize("encoding_function,kwargs,data_type", 
+                         [(AmplitudeEncoding, {}, DataType.ANALOG),
+                          (AmplitudeQRAM, {'number_of_address_qubits': 2}, DataType.ANALOG),
+                          (AngleEncoding, {}, DataType.ANALOG),
+                          (AngleEncoding, {'min_val': -16, 'max_val': 15}, DataType.ANALOG),
+                          (BasisEncoding, {}, DataType.DIGITAL),
+                          (FRQIEncoding, {}, DataType.ANALOG),
+                          (FRQIEncoding, {'min_val': -16, 'max_val': 15}, DataType.ANALOG)])
+def test_statevector_only(encoding_function: Callable , kwargs: dict , data_type: DataType) -> None:
+    
+    data_cases : list[np.ndarray]
+    if data_type == DataType.ANALOG:
+        data_cases = [np.random.uniform(low=-16, high=15, size=size) for size in [1, 2, 5, 8, 13]]
+        data_cases.append(np.random.uniform(low=-16, high=15, size=(4, 3)))
+    elif data_type == DataType.DIGITAL:
+        data_cases = [np.random.randint(low=-16, high=15, size=size) for size in [1, 2, 5, 8, 13]]
+
+    for data in data_cases:
+        # Only FRQI supports 2D data and AmplitudeQRAM needs more data than addresses
+        if np.ndim(data) == 2 and encoding_function != FRQIEncoding:
+            continue
+        if encoding_function == AmplitudeQRAM and np.size(data) < 8:
+            continue
+        _, result = encode_data(data, encoding_function, **kwargs)
+        state_vector = encode_data(data, encoding_function, statevector_only=True, **kwargs)
+        assert np.allclose(state_vector, result.get_statevector().data, atol=TOLERANCE)
+
+    with pytest.raises(ValueError):
+        encode_data([1, 2], lambda data: None, statevector_only=True)
+
+
+def test_statevector_only_positional_options() -> None:
+    data = np.random.randint(low=-16, high=15, size=5)
+
+    # The options of BasisEncoding (here use_Espresso) can be passed positionally, as without statevector_only
+    _, result = encode_data(data, BasisEncoding, False)
+    state_vector = encode_data(data, BasisEncoding, False, statevector_only=True)
+    assert np.allclose(state_vector, result.get_statevector().data, atol=TOLERANCE)
+
+
+
+@pytest.mark.parametrize("encoding_function,kwargs", 
+                         [(AmplitudeEncoding, {}),
+                          (AmplitudeEncoding, {'method': 'multiplexor'}),
+                          (AmplitudeQRAM, {}),
+                          (AmplitudeQRAM, {'number_of_address_qubits': 2}),
+                          (AngleEncoding, {}),
+                          (AngleEncoding, {'min_val': -16, 'max_val': 15}),
+                          (FRQIEncoding, {}),
+                          (FRQIEncoding, {'min_val': -16, 'max_val': 15})])
+def test_use_cache(encoding_function: Callable , kwargs: dict) -> None:
+
+    transpile_cache.clear()
+    for _ in range(3):
+        data = np.random.uniform(low=-16, high=15, size=6)
+        _, result = encode_data(data, encoding_function, use_cache=True, **kwargs)
+        expected_statevector = encode_data(data, encoding_function, statevector_only=True, **kwargs)
+        assert np.allclose(result.get_statevector().data, expected_statevector, atol=TOLERANCE)
+
+    # The template is only transpiled for the first call
+    assert transpile_cache.misses == 1
+    assert transpile_cache.hits == 2
+
+
+
+@pytest.mark.parametrize("encoding_function,kwargs", 
+                         [(AngleEncoding, {}),
+                          (FRQIEncoding, {}),
+                          (FRQIEncoding, {'method': 'multiplexor'})])
+def test_use_cache_min_max(encoding_function: Callable , kwargs: dict) -> None:
+
+    # Different normalizations only change the parameter values, so they share the template
+    transpile_cache.clear()
+    for min_val , max_val in [(-16, 15), (-20, 20), (0, 1)]:
+        data = np.random.uniform(low=min_val, high=max_val, size=6)
+        _, result = encode_data(data, encoding_function, min_val=min_val, max_val=max_val, use_cache=True, **kwargs)
+        expected_statevector = encode_data(data, encoding_function, min_val=min_val, max_val=max_val, statevector_only=True, **kwargs)
+        assert np.allclose(result.get_statevector().data, expected_statevector, atol=TOLERANCE)
+
+    assert transpile_cache.misses == 1
+    assert len(transpile_cache) == 1
+
+    # Other layouts are other templates
+    if encoding_function == FRQIEncoding:
+        encode_data(data, encoding_function, method="controlled" if kwargs else "multiplexor", use_cache=True)
+        assert transpile_cache.misses == 2
+
+
+def test_transpile_cache_dir(tmp_path: str) -> None:
+    # Each process encodes with use_cache=True and prints the statistics of its transpile cache
+    code = ("import numpy as np; from General_encoding import encode_data, transpile_cache; "
+            "from Encodings import AngleEncoding; encode_data(np.arange(6), AngleEncoding, use_cache=True); "
+            "print(transpile_cache.hits, transpile_cache.misses)")
+    env = dict(os.environ, QS_TRANSPILE_CACHE_DIR=str(tmp_path))
+    run = lambda: subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(SCRIPT_DIR), env=env,
+                                 capture_output=True, text=True, check=True).stdout.split()
+
+    # The first process transpiles and stores the template, the second one loads it
+    assert run() == ["0", "1"]
+    assert len(os.listdir(tmp_path)) == 1
+    assert run() == ["1", "0"]
+
+    # The same directory, set in this process
+    try:
+        configure_transpile_cache(str(tmp_path))
+        transpile_cache.clear()
+        data = np.random.uniform(low=-16, high=15, size=6)
+        _, result = encode_data(data, AngleEncoding, use_cache=True)
+        assert np.allclose(result.get_statevector().data, encode_data(data, AngleEncoding, statevector_only=True), atol=TOLERANCE)
+        assert (transpile_cache.hits , transpile_cache.misses) == (1, 0)
+    finally:
+        configure_transpile_cache(None)
+
+
+def test_AmplitudeQRAM_template() -> None:
+
+    for data_length , number_of_address_qubits in [(4, 0), (8, 1), (16, 2), (32, 3), (32, 1)]:
+        data = np.random.uniform(low=-16, high=15, size=data_length)
+        # An address without data
+        data[: data_length // 2**max(number_of_address_qubits, 1)] = 0
+
+        alphas = AmplitudeQRAM_angles(data, number_of_address_qubits)
+        assert alphas.shape == (2**number_of_address_qubits, data_length // 2**number_of_address_qubits - 1)
+
+        template = AmplitudeQRAM_template(int(np.log2(data_length)), number_of_address_qubits)
+        assert template.num_parameters == alphas.size
+
+        # The same layout for every data of this size, only the parameter values depend on the data
+        parameters = sorted(template.parameters, key=lambda parameter: parameter.index)
+        qc = template.assign_parameters(dict(zip(parameters, alphas.reshape(-1))))
+        assert np.allclose(Statevector(qc).data, AmplitudeQRAM_statevector(data, number_of_address_qubits), atol=TOLERANCE)
+
+    with pytest.raises(ValueError):
+        AmplitudeQRAM_template(2, 2)
+    with pytest.raises(ValueError):
+        AmplitudeQRAM_angles(np.ones(4), 2)
+
+
+def test_AmplitudeEncoding_multiplexor() -> None:
+
+    for data_length in [1, 2, 3, 4, 7, 8, 16, 32]:
+        data = np.random.uniform(low=-16, high=15, size=data_length)
+        # Some inputs with zero blocks and zero tails
+        if data_length >= 8:
+            data[data_length // 4 : data_length // 2] = 0
+            data[-2:] = 0
+
+        qc, result = encode_data(data, AmplitudeEncoding, method="multiplexor")
+        assert np.allclose(result.get_statevector().data, Amplitude_Expected_statevector(data), atol=TOLERANCE)
+
+        # One CNOT per angle of the multiplexors with at least one control
+        number_of_qubits = qc.num_qubits
+        assert qc.count_ops().get('cx', 0) == 2**number_of_qubits - 2
+
+    with pytest.raises(ValueError):
+        AmplitudeEncoding([1, 2], method="unknown")
+
+
+def test_FRQIEncoding_multiplexor() -> None:
+
+    for shape in [(2,), (5,), (16,), (8, 3), (4, 2)]:
+        data = np.random.uniform(low=-16, high=15, size=shape)
+
+        for use_cache in [False, True]:
+            _, result = encode_data(data, FRQIEncoding, method="multiplexor", use_cache=use_cache)
+            assert np.allclose(result.get_statevector().data, FRQIEncoding_statevector(data), atol=TOLERANCE)
+
+        # One CNOT per address for each data qubit
+        qc = FRQIEncoding(data, method="multiplexor")
+        number_of_addresses , data_dimensionality = FRQIEncoding_angles(data).shape
+        assert qc.count_ops().get('cx', 0) == number_of_addresses * data_dimensionality
+
+    with pytest.raises(ValueError):
+        FRQIEncoding([1, 2], method="unknown")
+
+
+
+def test_SparseAmplitudeEncoding() -> None:
+
+    for number_of_qubits in range(1, 9):
+        for number_of_non_zeros in [1, 2, 3, 5]:
+            number_of_non_zeros = min(number_of_non_zeros, 2**number_of_qubits)
+            indices = np.random.choice(2**number_of_qubits, number_of_non_zeros, replace=False)
+            values = np.random.uniform(low=-16, high=15, size=number_of_non_zeros)
+
+            dense_data = np.zeros(2**number_of_qubits)
+            dense_data[indices] = values
+
+            qc, result = encode_data((indices, values), SparseAmplitudeEncoding, number_of_qubits=number_of_qubits)  # type: ignore[call-overload]
+            assert np.allclose(result.get_statevector().data, Amplitude_Expected_statevector(dense_data), atol=TOLERANCE)
+
+            # The size of the circuit scales with the number of non-zeros
+            assert qc.size() <= number_of_qubits * number_of_non_zeros
+
+    # scipy.sparse input with a single row
+    from scipy.sparse import csr_matrix
+    dense_data = np.array([0, 0, 3, 0, 0, -4, 0])
+    _, result = encode_data(csr_matrix(dense_data), SparseAmplitudeEncoding)
+    assert np.allclose(result.get_statevector().data, Amplitude_Expected_statevector(dense_data), atol=TOLERANCE)
+
+    with pytest.raises(ValueError):
+        SparseAmplitudeEncoding(([1, 2], [0, 0]))
+    with pytest.raises(ValueError):
+        SparseAmplitudeEncoding(([1, 1], [1, 2]))
+    with pytest.raises(ValueError):
+        SparseAmplitudeEncoding(([9], [1]), number_of_qubits=3)
+
+
+
+def test_pruning() -> None:
+
+    for number_of_qubits in range(1, 6):
+        # Structured inputs: a single non-zero, zero blocks and repeated values
+        data_cases = [np.eye(2**number_of_qubits)[0], np.eye(2**number_of_qubits)[-1], np.ones(2**number_of_qubits)]
+        data = np.random.uniform(low=-16, high=15, size=2**number_of_qubits)
+        data[: 2**number_of_qubits // 2] = 0
+        data_cases.append(data)
+
+        for data in data_cases:
+            qc, result = encode_data(data, AmplitudeEncoding)
+            assert np.allclose(result.get_statevector().data, Amplitude_Expected_statevector(data), atol=TOLERANCE)
+
+            # Every gate of the unpruned circuit is either appended, pruned or simplified
+            unpruned_qc = circuit_maker_amplitude_encoding(QuantumCircuit(number_of_qubits), AmplitudeEncoding_angles(data), number_of_qubits, tolerance=None)
+            assert qc.size() + qc.metadata["pruned_gates"] == unpruned_qc.size()
+
+        # |0> does not need any gate
+        assert AmplitudeEncoding(np.eye(2**number_of_qubits)[0]).size() == 0
+
+    # Addresses without data are skipped
+    data = np.random.uniform(low=-16, high=15, size=16)
+    data[4:12] = 0
+    qc, result = encode_data(data, AmplitudeQRAM, number_of_address_qubits=2)
+    assert np.allclose(result.get_statevector().data, AmplitudeQRAM_statevector(data, number_of_address_qubits=2), atol=TOLERANCE)
+    assert qc.metadata["pruned_gates"] >= 2 * 3
+
+    # The RY(0) of the minimum values and the RY(π) of the maximum values
+    data = np.array([0, 7, 15, 0, 15, 3])
+    qc, result = encode_data(data, FRQIEncoding)
+    assert np.allclose(result.get_statevector().data, FRQIEncoding_statevector(data), atol=TOLERANCE)
+    assert qc.metadata == {"pruned_gates": 4, "simplified_gates": 2}
+
+
+
+def recursive_amplitude_encoding(QCircuit: QuantumCircuit, alpha: Any, n: int, control_qubits: list, control_state: int = 0, 
+                                 target_qubit_offset: int = 0, tolerance: Optional[float] = PRUNE_TOLERANCE) -> QuantumCircuit:
+    # The recursive version of circuit_maker_amplitude_encoding, as a reference
+    if n == 1:
+        append_pruned_ry(QCircuit, alpha[0], control_qubits, control_state, target_qubit_offset, tolerance, target_state=0)
+    elif n == 2:
+        control_qubits = list(set(control_qubits))
+        append_pruned_ry(QCircuit, alpha[0], control_qubits, control_state, target_qubit_offset, tolerance, target_state=0)
+        multiple = append_pruned_ry(QCircuit, -alpha[1], control_qubits + [target_qubit_offset], control_state + 2**len(control_qubits),
+                                    target_qubit_offset + 1, tolerance, target_state=0)
+        if multiple in (0, 2):
+            record_pruning(QCircuit, removed=1)
+        else:
+            append_pruned_ry(QCircuit, np.pi + alpha[2], control_qubits + [target_qubit_offset + 1], control_state + 2**len(control_qubits),
+                             target_qubit_offset, tolerance, target_state=1)
+    else:
+        control_qubits = list(set(control_qubits))
+        QCircuit = recursive_amplitude_encoding(QCircuit, alpha, n - 1, control_qubits, control_state, target_qubit_offset, tolerance)
+        multiple = append_pruned_ry(QCircuit, alpha[2**(n-1)-1], control_qubits + list(range(target_qubit_offset, target_qubit_offset + n-1)),
+                                    control_state + 2**len(control_qubits) * (2**(n-1) - 1), target_qubit_offset + n-1, tolerance, target_state=0)
+        if multiple in (0, 2):
+            record_pruning(QCircuit, removed=(n-1) + number_of_amplitude_encoding_gates(n-1))
+            return QCircuit
+        for i in range(n-1):
+            QCircuit.append(controlled_x(1 + len(control_qubits), control_state + 2**len(control_qubits)),
+                            control_qubits + [target_qubit_offset + n-1, target_qubit_offset + i])
+        control_qubits.append(target_qubit_offset + n-1)
+        QCircuit = recursive_amplitude_encoding(QCircuit, alpha[2**(n-1):], n - 1, control_qubits, control_state + 2**(len(control_qubits)-1),
+                                                target_qubit_offset, tolerance)
+    return QCircuit
+
+
+@pytest.mark.parametrize("number_of_control_qubits,control_state,max_n", [(0, 0, 5), (2, 1, 4)])
+def test_circuit_maker_amplitude_encoding_iterative(number_of_control_qubits: int, control_state: int, max_n: int) -> None:
+
+    for n in range(1, max_n + 1):
+        data_cases = [np.eye(2**n)[0], np.eye(2**n)[-1], np.ones(2**n), np.random.uniform(low=-16, high=15, size=2**n)]
+        data = np.random.uniform(low=-16, high=15, size=2**n)
+        data[: 2**n // 4] = 0
+        data[-1] = 0
+        data_cases.append(data)
+
+        alpha_cases : list[Any] = [AmplitudeEncoding_angles(data) for data in data_cases] + [ParameterVector("α", 2**n - 1)]
+        for alpha in alpha_cases:
+            for tolerance in [PRUNE_TOLERANCE, None]:
+                control_qubits = list(range(number_of_control_qubits))
+                qc = circuit_maker_amplitude_encoding(QuantumCircuit(number_of_control_qubits + n), alpha, n, control_qubits, control_state,
+                                                      number_of_control_qubits, tolerance)
+                expected_qc = recursive_amplitude_encoding(QuantumCircuit(number_of_control_qubits + n), alpha, n, control_qubits, control_state,
+                                                           number_of_control_qubits, tolerance)
+
+                # The same gates, in the same order, and the same pruning
+                assert qc.data == expected_qc.data
+                assert qc.global_phase == expected_qc.global_phase
+                assert qc.metadata == expected_qc.metadata
+
+                # The control qubits are not modified
+                assert control_qubits == list(range(number_of_control_qubits))
+
+
+@pytest.mark.parametrize("control_qubits,control_state", [([3], 0), ([3], 1), ([3, 4], 1), ([4, 3], 2), ([0, 4], 2)])
+def test_circuit_maker_amplitude_encoding_controls_above(control_qubits: list, control_state: int) -> None:
+    
+    # The data qubits are below (some of) the control qubits. The recursive version sorted the control qubits 
+    # with a set, which did not match their bits in the control state, the gates must be enabled by this state
+    n = 3
+    number_of_qubits = n + len(control_qubits)
+    target_qubit_offset = 1 if 0 in control_qubits else 0
+    data = np.random.uniform(low=-16, high=15, size=2**n)
+
+    qc = QuantumCircuit(number_of_qubits)
+    for k , qubit in enumerate(control_qubits):
+        if (control_state >> k) & 1:
+            qc.x(qubit)
+    qc = circuit_maker_amplitude_encoding(qc, AmplitudeEncoding_angles(data), n, control_qubits, control_state, target_qubit_offset)
+
+    # The data in the data qubits, and the control qubits in the control state
+    control_index = sum(((control_state >> k) & 1) << qubit for k , qubit in enumerate(control_qubits))
+    expected_statevector = np.zeros(2**number_of_qubits)
+    expected_statevector[control_index + (np.arange(2**n) << target_qubit_offset)] = data / np.linalg.norm(data)
+    assert np.allclose(Statevector(qc).data, expected_statevector, atol=TOLERANCE)
+
 
 if __name__ == "__main__":
     
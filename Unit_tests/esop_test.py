@@ -0,0 +1,265 @@
+# Add the parent directory of the current script's directory to the Python path
+import sys
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))  # Get the directory of the current script
+sys.path.append(os.path.dirname(SCRIPT_DIR))  # Add the parent directory to the Python path
+
+
+# Import External modules
+import numpy as np
+import pytest
+from qiskit import transpile
+from qiskit.quantum_info import Statevector
+
+# Import Local modules
+from Utilities.esop.esop_minimizer import minimize_esop, evaluate_esop
+from Utilities.esop.esop_cache import EsopCache
+from Utilities.esop.esop_cost import esop_cost, mcx_cx_count
+from Encodings import qs_BasisEncoding
+from Encodings.qs_BasisEncoding import BasisEncoding
+from Utilities.esop import call_esop_exe
+
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+
+def test_minimize_esop_random() -> None:
+    for number_of_vars in range(0, 9):
+        for _ in range(10):
+            truth_table = np.random.random(2**number_of_vars) < np.random.random()
+            esop = minimize_esop(truth_table)
+            assert np.array_equal(evaluate_esop(esop, number_of_vars), truth_table)
+
+
+def test_minimize_esop_constants() -> None:
+    assert minimize_esop(np.zeros(8)) == []
+    assert minimize_esop(np.ones(8)) == [([], [])]
+
+    # A single minterm is a single cube with every variable
+    truth_table = np.zeros(8)
+    truth_table[5] = 1
+    assert minimize_esop(truth_table) == [([2, 0], [1])]
+
+    # x0 XOR x1 XOR x2 is a cube per variable
+    truth_table = np.array([bin(i).count("1") % 2 for i in range(8)])
+    assert sorted(minimize_esop(truth_table)) == [([0], []), ([1], []), ([2], [])]
+
+
+def test_minimize_esop_invalid_length() -> None:
+    with pytest.raises(ValueError):
+        minimize_esop([0, 1, 1])
+
+
+@pytest.mark.skipif(not os.access(call_esop_exe.exe_path, os.X_OK), reason="The esop executable is missing")
+def test_minimize_esop_exe_cube_counts() -> None:
+    # A fixed set of truth tables
+    rng = np.random.default_rng(0)
+    python_counts , exe_counts = [] , []
+    for number_of_vars in range(2, 7):
+        for _ in range(10):
+            truth_table = rng.random(2**number_of_vars) < 0.5
+            hex_truth_table = qs_BasisEncoding.bin_str_to_hex_str(qs_BasisEncoding.bits_to_bin_str(truth_table))
+            output = call_esop_exe.execute_exe_with_args(call_esop_exe.exe_path, [str(number_of_vars), hex_truth_table])
+
+            exe_esop = call_esop_exe.parse_output(output)
+            assert np.array_equal(evaluate_esop(exe_esop, number_of_vars), truth_table)
+            python_counts.append(len(minimize_esop(truth_table)))
+            exe_counts.append(len(exe_esop))
+
+    # The engines do not find the same ESOPs: fewer cubes in total, but at most one more for a single truth table
+    assert python_counts != exe_counts
+    assert sum(python_counts) < sum(exe_counts)
+    assert max(np.array(python_counts) - np.array(exe_counts)) <= 1
+
+
+def test_BasisEncoding_esop_engines() -> None:
+    data = np.random.randint(low=-16, high=15, size=16)
+
+    python_qc = BasisEncoding(data, esop_engine="python")
+    exe_qc = BasisEncoding(data, esop_engine="exe")
+
+    assert Statevector(python_qc).equiv(Statevector(exe_qc))
+
+    with pytest.raises(ValueError):
+        BasisEncoding(data, esop_engine="unknown")
+
+
+def test_minimize_truth_table_hierarchical(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(qs_BasisEncoding, "esop_cache", EsopCache())
+
+    for number_of_vars in range(1, 9):
+        truth_table = np.random.random(2**number_of_vars) < np.random.random()
+        bin_truth_table = "".join("1" if value else "0" for value in truth_table)
+
+        # Splitting on the top variables is the same PKRM expansion, so the ESOPs have the same size
+        for max_vars in range(1, number_of_vars + 1):
+            esop = qs_BasisEncoding.minimize_truth_table_hierarchical(number_of_vars, bin_truth_table, max_vars=max_vars)
+            assert np.array_equal(evaluate_esop(esop, number_of_vars), truth_table)
+            assert len(esop) == len(minimize_esop(truth_table))
+
+    with pytest.raises(ValueError):
+        qs_BasisEncoding.minimize_truth_table_hierarchical(2, "0110", max_vars=0)
+
+
+def test_BasisEncoding_hierarchical() -> None:
+    data = np.random.randint(low=-64, high=63, size=64)
+
+    hierarchical_qc = BasisEncoding(data, esop_engine="exe", esop_max_vars=4)
+    assert Statevector(hierarchical_qc).equiv(Statevector(BasisEncoding(data, use_Espresso=False)))
+    assert hierarchical_qc.size() <= BasisEncoding(data, use_Espresso=False).size()
+
+
+def test_share_cubes() -> None:
+    plane_esops : list[list[tuple[list[int], list[int]]]] = [[([0, 1], []), ([2], [])], [([1, 0], []), ([], [])], [([0], [1, 2]), ([0, 1], [])]]
+
+    shared_cubes , remaining_esops = qs_BasisEncoding.share_cubes(plane_esops)
+    assert shared_cubes == [(([0, 1], []), [0, 1, 2])]
+    assert remaining_esops == [[([2], [])], [([], [])], [([0], [1, 2])]]
+
+    # A single control is not shared
+    plane_esops = [[([0], [])], [([0], [])]]
+    assert qs_BasisEncoding.share_cubes(plane_esops) == ([], plane_esops)
+
+
+@pytest.mark.parametrize("use_ancilla", [False, True])
+def test_BasisEncoding_multi_output(use_ancilla: bool) -> None:
+    # Correlated bits
+    data = (np.arange(64)**2) % 13 - np.arange(64) % 3
+
+    single_output_qc = BasisEncoding(data)
+    multi_output_qc = BasisEncoding(data, multi_output=True, use_ancilla=use_ancilla)
+    # The bits are chosen by the estimated number of CX gates
+    cx_count = lambda qc: transpile(qc, basis_gates=["cx", "u"], optimization_level=0).count_ops().get("cx", 0)
+    assert cx_count(multi_output_qc) < cx_count(single_output_qc)
+    assert multi_output_qc.metadata["copied_bits"] > 0
+
+    # The ancilla (the most significant qubit, if any) is left in |0>
+    statevector = qs_BasisEncoding.BasisEncoding_statevector(data)
+    statevector = np.concatenate([statevector, np.zeros(2**multi_output_qc.num_qubits - len(statevector))])
+    assert Statevector(multi_output_qc).equiv(Statevector(statevector))
+
+
+def test_analyze_bit_planes() -> None:
+    truth_tables = ["0000", "1111", "0110", "0111", "0111", "1000", "1001", "0101"]
+    inv_truth_tables = [qs_BasisEncoding.xor_bin_str(truth_table, "1111") for truth_table in truth_tables]
+
+    plane_kinds , plane_esops , copy_sources = qs_BasisEncoding.analyze_bit_planes(2, truth_tables, inv_truth_tables)
+    assert plane_kinds == ["constant", "constant", "linear", "esop", "copy", "complement", "linear", "linear"]
+    assert plane_esops == [[], [([], [])], [([0], []), ([1], [])], [], [], [([], [])], [([], [0]), ([1], [])], [([0], [])]]
+    assert copy_sources == [None, None, None, None, 3, 3, None, None]
+
+
+def test_BasisEncoding_analyze_planes(monkeypatch: pytest.MonkeyPatch) -> None:
+    # The low bits are linear in the address
+    data = np.array([3*i + 1 + (i % 4 == 1) * 16 * 3 for i in range(16)])
+
+    monkeypatch.setattr(qs_BasisEncoding, "esop_cache", EsopCache())
+    qc = BasisEncoding(data)
+    assert qc.metadata["plane_kinds"].count("esop") < len(qc.metadata["plane_kinds"])
+
+    # Only the "esop" bits (and their inverses) are minimized
+    assert qs_BasisEncoding.esop_cache.misses <= 2 * qc.metadata["plane_kinds"].count("esop")
+    assert Statevector(qc).equiv(Statevector(qs_BasisEncoding.BasisEncoding_statevector(data)))
+    assert qc.size() <= BasisEncoding(data, analyze_planes=False).size()
+
+
+def test_esop_cost() -> None:
+    assert [mcx_cx_count(k) for k in range(7)] == [0, 1, 6, 14, 36, 92, 188]
+    assert esop_cost([]) == (0, 0)
+    assert esop_cost([([], []), ([0], []), ([0, 1], [2])]) == (0 + 1 + 14, 1 + 1 + 14 + 2)
+
+
+def test_cheapest_realization() -> None:
+    # The inverse of a single address is a X gate and a cube
+    assert qs_BasisEncoding.cheapest_realization(2, "0111", [([0], []), ([1], []), ([0, 1], [])], [([], [0, 1])]) == \
+        ("esop_inverse", [([], []), ([], [0, 1])], (6, 9))
+
+    # Fewer gates than the ESOPs, even with every address qubit as control
+    name , esop , _ = qs_BasisEncoding.cheapest_realization(2, "0100", [([0], []), ([0, 1], [])], [([], []), ([0], []), ([0, 1], [])])
+    assert (name , esop) == ("direct", [([0], [1])])
+
+    # A custom cost model: the number of gates, the ESOP is chosen when they have the same cost
+    name , _ , cost = qs_BasisEncoding.cheapest_realization(2, "0111", [([0], []), ([1], []), ([0, 1], [])], [([], [0, 1]), ([1], [])],
+                                                            cost_model=lambda esop: (len(esop), 0))
+    assert (name , cost) == ("esop", (3, 0))
+
+
+def test_BasisEncoding_cost_model() -> None:
+    data = np.random.randint(low=-8, high=7, size=16)
+
+    qc = BasisEncoding(data)
+    assert len(qc.metadata["plane_synthesis"]) == qc.num_qubits - 4
+    assert set(qc.metadata["plane_synthesis"]) <= {"constant", "copy", "complement", "linear", "esop", "esop_inverse", "direct"}
+
+    # Any cost model gives the same state
+    for cost_model in [esop_cost, lambda esop: (len(esop), 0), lambda esop: (-len(esop), 0)]:
+        qc = BasisEncoding(data, cost_model=cost_model)
+        assert Statevector(qc).equiv(Statevector(qs_BasisEncoding.BasisEncoding_statevector(data)))
+
+
+
+# Test cases for EsopCache
+
+def test_esop_cache_lru() -> None:
+    cache = EsopCache(max_size=2)
+    cache.get((1, "1", "python"), lambda: [([0], [])])
+    cache.get((1, "2", "python"), lambda: [([], [0])])
+    cache.get((1, "1", "python"), lambda: pytest.fail("The ESOP should be in memory"))
+    cache.get((2, "1", "python"), lambda: [([0], [1])])   # Evicts (1, "2"), the least recently used
+    assert len(cache) == 2
+    assert cache.stats() == {"hits": 1, "disk_hits": 0, "misses": 3, "size": 2}
+
+    with pytest.raises(ValueError):
+        EsopCache(max_size=0)
+
+
+def store_esop(cache_path: str, hex_truth_table: str) -> list:
+    # Run in a worker process
+    return EsopCache(cache_path=cache_path).get((2, hex_truth_table, "python"), lambda: [([0], [1])])
+
+
+def test_esop_cache_disk(tmp_path: str) -> None:
+    cache_path = os.path.join(tmp_path, "esop.sqlite")
+
+    # Several processes writing to the same file
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        esops = list(pool.map(store_esop, [cache_path] * 4, ["1", "2", "1", "2"]))
+    assert esops == [[([0], [1])]] * 4
+
+    # A new cache (e.g. in another process) loads the ESOP from disk instead of minimizing it
+    cache = EsopCache(cache_path=cache_path)
+    assert cache.get((2, "2", "python"), lambda: pytest.fail("The ESOP should be loaded from disk")) == [([0], [1])]
+    assert cache.stats() == {"hits": 1, "disk_hits": 1, "misses": 0, "size": 1}
+
+
+def test_BasisEncoding_esop_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(qs_BasisEncoding, "esop_cache", EsopCache())
+
+    # Every truth table of the second encoding of the same data is already minimized
+    BasisEncoding([-3, 1, 2, 0])
+    hits , misses = qs_BasisEncoding.esop_cache.hits , qs_BasisEncoding.esop_cache.misses
+    BasisEncoding([-3, 1, 2, 0])
+    assert qs_BasisEncoding.esop_cache.misses == misses
+    assert qs_BasisEncoding.esop_cache.hits == hits + hits + misses
+
+
+
+def test_BasisEncoding_concurrent_esop(monkeypatch: pytest.MonkeyPatch) -> None:
+    data = np.random.randint(low=-128, high=127, size=32)
+
+    monkeypatch.setattr(qs_BasisEncoding, "esop_cache", EsopCache())
+    sequential_qc = BasisEncoding(data, esop_engine="exe", esop_workers=1)
+
+    # Same gates, in the same order
+    monkeypatch.setattr(qs_BasisEncoding, "esop_cache", EsopCache())
+    concurrent_qc = BasisEncoding(data, esop_engine="exe", esop_workers=4)
+    assert concurrent_qc == sequential_qc
+
+    monkeypatch.setattr(qs_BasisEncoding, "esop_cache", EsopCache())
+    with pytest.raises(subprocess.TimeoutExpired):
+        BasisEncoding(data, esop_engine="exe", esop_workers=4, esop_timeout=1e-6)
+
+    with pytest.raises(ValueError):
+        BasisEncoding(data, esop_workers=0)
+
@@ -0,0 +1,45 @@
+# Add the parent directory of the current script's directory to the Python path
+import sys
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))  # Get the directory of the current script
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+
+# Import External modules
+import subprocess
+
+
+# Maximum time that importing General_encoding may add on top of importing numpy and qiskit, as a fraction of the
+# time of importing numpy and qiskit measured in the same interpreter (so that it does not depend on the machine)
+IMPORT_TIME_BUDGET = 0.5
+
+# Modules that must only be imported when they are first used
+LAZY_MODULES = ["matplotlib", "qiskit.visualization", "qiskit_aer", "Utilities.esop.call_esop_exe"]
+
+
+def run_in_fresh_interpreter(code: str) -> str:
+    # A new interpreter, so that the modules imported by the other tests are not in sys.modules
+    process = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    return process.stdout.strip()
+
+
+def test_lazy_imports() -> None:
+    code = f"import sys, General_encoding; print([m for m in {LAZY_MODULES} if m in sys.modules])"
+    assert run_in_fresh_interpreter(code) == "[]"
+
+    # Only the module of the requested encoding is imported
+    code = "import sys; from Encodings import AngleEncoding; print(sorted(m for m in sys.modules if m.startswith('Encodings.')))"
+    assert run_in_fresh_interpreter(code) == "['Encodings.qs_AngleEncoding']"
+
+
+def test_import_time_budget() -> None:
+    code = ("import sys, time; start = time.perf_counter(); import numpy, qiskit; baseline = time.perf_counter() - start; "
+            "start = time.perf_counter(); import General_encoding; import_time = time.perf_counter() - start; "
+            f"print(import_time / baseline, [m for m in {LAZY_MODULES} if m in sys.modules])")
+
+    # The best of a few runs, to ignore a slow start of the interpreter
+    results = [run_in_fresh_interpreter(code).split(" ", 1) for _ in range(3)]
+    assert min(float(ratio) for ratio , _ in results) < IMPORT_TIME_BUDGET
+
+    # The heavy modules are not part of the measured import
+    assert all(lazy_modules == "[]" for _ , lazy_modules in results)
@@ -16,6 +16,13 @@ import pytest
 
 # Import Local modules
 from Utilities.utils import pad_with_zeros
+from Utilities.transpile_cache import TranspileCache
+from Utilities.gate_factory import controlled_x, controlled_ry, clear_gate_cache, _parameterized_ry_definition
+
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter
+from qiskit.circuit.library import RYGate, XGate
+from qiskit.quantum_info import Operator
 
 
 # Test cases for pad_with_zeros function
@@ -68,3 +75,78 @@ def test_pad_with_zeros_string_input() -> None :
 def test_pad_with_zeros_list_input() -> None :
     with pytest.raises(TypeError):
         padded_arr = pad_with_zeros([1, 2, 3], 5) # type: ignore[arg-type]
+
+
+
+# Test cases for TranspileCache
+
+def make_circuit(number_of_qubits: int) -> QuantumCircuit:
+    qc = QuantumCircuit(number_of_qubits)
+    qc.h(range(number_of_qubits))
+    return qc
+
+def test_transpile_cache_lru() -> None :
+    cache = TranspileCache(max_size=2)
+    cache.get(1, lambda: make_circuit(1))
+    cache.get(2, lambda: make_circuit(2))
+    cache.get(1, lambda: make_circuit(1))
+    cache.get(3, lambda: make_circuit(3))   # Evicts key 2, the least recently used
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    qc = cache.get(2, lambda: make_circuit(2))
+    assert qc.num_qubits == 2
+    assert cache.misses == 4
+
+def test_transpile_cache_disk(tmp_path: str) -> None :
+    cache = TranspileCache(cache_dir=str(tmp_path))
+    cache.get(("key", 3), lambda: make_circuit(3))
+
+    # A new cache (e.g. in another process) loads the circuit from disk instead of building it
+    other_cache = TranspileCache(cache_dir=str(tmp_path))
+    qc = other_cache.get(("key", 3), lambda: pytest.fail("The circuit should be loaded from disk"))
+    assert qc.num_qubits == 3
+    assert other_cache.hits == 1 and other_cache.misses == 0
+
+def test_transpile_cache_invalid_size() -> None :
+    with pytest.raises(ValueError):
+        TranspileCache(max_size=0)
+
+
+# Test cases for the gate factory
+
+def test_controlled_x_shared() -> None :
+    clear_gate_cache()
+    gate = controlled_x(3, 5)
+    assert controlled_x(3, np.int64(5)) is gate
+    assert controlled_x(3, 4) is not gate
+    assert Operator(gate).equiv(Operator(XGate().control(3, ctrl_state=5)))
+    assert controlled_x(0, 0).name == "x"
+
+@pytest.mark.parametrize("number_of_controls", [1, 3, 4, 5, 6])
+def test_controlled_ry_shared(number_of_controls: int) -> None :
+    clear_gate_cache()
+    control_state = 2**number_of_controls - 2
+    for angle in [0.3, np.float64(-1.1), 2.5]:
+        gate = controlled_ry(angle, number_of_controls, control_state)
+        assert Operator(gate).equiv(Operator(RYGate(angle).control(number_of_controls, ctrl_state=control_state)))
+
+    # Every angle is bound from the same definition, it is only built once
+    assert _parameterized_ry_definition.cache_info().misses == 1
+    assert _parameterized_ry_definition.cache_info().hits == 2
+    assert controlled_ry(0.3, 0, 0).name == "ry"
+
+@pytest.mark.parametrize("number_of_controls", [1, 3, 4, 5, 6])
+def test_controlled_ry_parameterized(number_of_controls: int) -> None :
+    theta = Parameter("θ")
+    control_state = 2**number_of_controls - 2
+    gate = controlled_ry(theta, number_of_controls, control_state)
+
+    # Qiskit cannot build the gate with an unbound parameter from 4 controls on, the factory can
+    qc = QuantumCircuit(number_of_controls + 1)
+    qc.append(gate, range(number_of_controls + 1))
+    bound = qc.assign_parameters({theta: 1.2})
+
+    expected = QuantumCircuit(number_of_controls + 1)
+    expected.append(RYGate(1.2).control(number_of_controls, ctrl_state=control_state), range(number_of_controls + 1))
+    assert Operator(bound).equiv(Operator(expected))
@@ -1,7 +1,9 @@
 import subprocess
 import sys
 
-def execute_exe_with_args(exe_path:str, args:list[str]) -> str:
+from typing import Optional
+
+def execute_exe_with_args(exe_path:str, args:list[str], timeout:Optional[float] = None) -> str:
     # Formulate the command as a list where the first item is the executable path
     # followed by its arguments
     command = [exe_path] + args
@@ -9,8 +11,13 @@ def execute_exe_with_args(exe_path:str, args:list[str]) -> str:
     # Use subprocess to run the command
     process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
-    # Wait for the process to finish and get the output
-    stdout, stderr = process.communicate()
+    # Wait for the process to finish and get the output, a process that takes longer than the timeout is killed
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        raise
 
     # Check if there were any errors
     if process.returncode != 0:
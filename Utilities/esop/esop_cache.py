@@ -0,0 +1,141 @@
+import os
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Typing stuff
+from typing import Callable, Optional
+
+
+# Cubes of an ESOP, each one as a tuple (pos, neg), see `Utilities.esop.esop_minimizer.minimize_esop`
+Esop = list[tuple[list[int], list[int]]]
+
+# Key of a minimized truth table: (number of variables, hex truth table, ESOP engine)
+EsopKey = tuple[int, str, str]
+
+
+class EsopCache:
+    """
+    Content-addressed cache of ESOP minimization results, with a least recently used (LRU) layer in memory
+    and, optionally, a SQLite file that is shared by processes (e.g. the workers of `encode_batch`).
+
+    Args:
+        max_size (int, optional): The maximum number of ESOPs kept in memory. Defaults to 4096.
+        cache_path (str, optional): The path of a SQLite file where the ESOPs are also stored, so that they can be
+                                    reused across processes and runs. Defaults to None (memory only).
+    """
+
+    def __init__(self, max_size: int = 4096, cache_path: Optional[str] = None) -> None:
+        if max_size < 1:
+            raise ValueError("Input max_size must be at least 1")
+
+        self.max_size = max_size
+        self.cache_path = cache_path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._esops : OrderedDict[EsopKey, Esop] = OrderedDict()
+
+        # The cache is shared by the threads that minimize the planes of BasisEncoding
+        self._lock = threading.Lock()
+
+        # The connection of each thread and process (a connection must not be used after a fork)
+        self._local = threading.local()
+
+        if cache_path is not None:
+            directory = os.path.dirname(os.path.abspath(cache_path))
+            os.makedirs(directory, exist_ok=True)
+            self._connect()
+
+    def get(self, key: EsopKey, build: Callable[[], Esop]) -> Esop:
+        """
+        Get the ESOP stored under the key, minimizing (and storing) it if it is missing.
+
+        Args:
+            key (tuple): The number of variables, the hex truth table and the ESOP engine.
+            build (callable): A function without arguments that returns the minimized ESOP.
+
+        Returns:
+            list: The cached ESOP. It is shared, so it must not be modified.
+        """
+        with self._lock:
+            if key in self._esops:
+                self.hits += 1
+                self._esops.move_to_end(key)
+                return self._esops[key]
+
+        # The lock is not held while minimizing, so that other truth tables are minimized meanwhile
+        esop : Optional[Esop] = self._load(key)
+        from_disk = esop is not None
+        if esop is None:
+            esop = build()
+            self._store(key, esop)
+
+        with self._lock:
+            if from_disk:
+                self.hits += 1
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+
+            self._esops[key] = esop
+            if len(self._esops) > self.max_size:
+                # Remove the least recently used ESOP
+                self._esops.popitem(last=False)
+
+        return esop
+
+    def clear(self) -> None:
+        """
+        Remove every ESOP kept in memory and reset the statistics (the SQLite file is kept).
+        """
+        with self._lock:
+            self._esops.clear()
+            self.hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the statistics of the cache.
+
+        Returns:
+            dict: The number of hits (and how many of them came from the SQLite file), misses and ESOPs in memory.
+        """
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "size": len(self._esops)}
+
+    def __len__(self) -> int:
+        return len(self._esops)
+
+    def _connect(self) -> sqlite3.Connection:
+        assert self.cache_path is not None
+
+        connection : Optional[sqlite3.Connection] = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            # Writers wait for each other instead of failing, and readers are not blocked by a writer (WAL)
+            connection = sqlite3.connect(self.cache_path, timeout=60, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS esops (number_of_vars INTEGER, truth_table TEXT, "
+                               "engine TEXT, esop TEXT, PRIMARY KEY (number_of_vars, truth_table, engine))")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    def _load(self, key: EsopKey) -> Optional[Esop]:
+        if self.cache_path is None:
+            return None
+
+        row = self._connect().execute("SELECT esop FROM esops WHERE number_of_vars = ? AND truth_table = ? AND engine = ?", key).fetchone()
+        if row is None:
+            return None
+
+        return [(pos, neg) for pos, neg in json.loads(row[0])]
+
+    def _store(self, key: EsopKey, esop: Esop) -> None:
+        if self.cache_path is None:
+            return
+
+        # Another process may have stored the same truth table meanwhile, both results are valid
+        self._connect().execute("INSERT OR IGNORE INTO esops VALUES (?, ?, ?, ?)", key + (json.dumps(esop),))
@@ -0,0 +1,60 @@
+# Typing stuff
+from typing import Callable
+
+from Utilities.esop.esop_cache import Esop
+
+
+# Estimated cost of a circuit, compared as a tuple: (number of CX gates, depth)
+Cost = tuple[int, int]
+
+# A cost model gives the estimated cost of the multi-controlled X gates of an ESOP on a single target qubit
+CostModel = Callable[[Esop], Cost]
+
+# Number of CX gates of a multi-controlled X gate with k controls once transpiled to ["cx", "u"] (qiskit 1.0, no ancillas),
+# from 5 controls on it is 3 * 2^k - 4
+MCX_CX_COUNTS = [0, 1, 6, 14, 36]
+
+
+def mcx_cx_count(number_of_controls: int) -> int:
+    """
+    Estimates the number of CX gates of a transpiled multi-controlled X gate.
+
+    Args:
+        number_of_controls (int): The number of controls, 0 is a X gate.
+
+    Returns:
+        int: The estimated number of CX gates.
+    """
+    if number_of_controls < len(MCX_CX_COUNTS):
+        return MCX_CX_COUNTS[number_of_controls]
+    return int(3 * 2**number_of_controls - 4)
+
+
+def esop_cost(esop: Esop) -> Cost:
+    """
+    The default cost model: the estimated number of CX gates and depth of the transpiled gates of an ESOP.
+
+    The gates of an ESOP share their target qubit, so they are not parallel: the depth is the sum of the depths of the
+    gates, where a X gate has depth 1 and the negative controls of a gate add a layer of X gates before and after it.
+
+    Args:
+        esop (list): The cubes of the ESOP, each one as a tuple (pos, neg) with the controls that must be 1 and 0.
+
+    Returns:
+        tuple: The estimated number of CX gates and depth.
+    """
+    cx_count = 0
+    depth = 0
+    for pos , neg in esop:
+        gate_cx_count = mcx_cx_count(len(pos) + len(neg))
+        cx_count += gate_cx_count
+        depth += max(gate_cx_count, 1) + (2 if neg else 0)
+
+    return cx_count , depth
+
+
+def add_costs(cost_1: Cost, cost_2: Cost) -> Cost:
+    """
+    Adds two costs (of gates that are applied one after the other).
+    """
+    return cost_1[0] + cost_2[0] , cost_1[1] + cost_2[1]
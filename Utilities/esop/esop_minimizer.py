@@ -0,0 +1,135 @@
+import numpy as np
+
+# Typing stuff
+from typing import Union
+
+
+# The expansion used for a cofactor, as the index of the child that is NOT used
+# f = ~x*f0 ^ x*f1 (Shannon) , f = f0 ^ x*f2 (positive Davio) , f = f1 ^ ~x*f2 (negative Davio) , with f2 = f0 ^ f1
+SHANNON , POSITIVE_DAVIO , NEGATIVE_DAVIO = 2 , 1 , 0
+
+# The order in which the expansions are preferred when they have the same cost, the Davio expansions add a literal
+# to the cubes of only one child and positive literals are controls that do not need X gates
+EXPANSION_PREFERENCE = np.array([POSITIVE_DAVIO, NEGATIVE_DAVIO, SHANNON])
+
+
+def minimize_esop(truth_table : Union[list, np.ndarray]) -> list[tuple[list[int], list[int]]]:
+    """
+    Finds an ESOP (exclusive sum of products) of a boolean function, from its optimum pseudo-Kronecker
+    Reed-Muller (PKRM) expression, in-process with NumPy.
+
+    For each variable, from the most significant to the least significant one, every cofactor of the function
+    is expanded with the cheapest of the Shannon, positive Davio and negative Davio expansions. The cofactors of
+    each level are deduplicated, so the cost of each distinct cofactor is only computed once.
+
+    It is not equivalent to `esop_from_optimum_pkrm` of the bundled esop executable, whose ESOPs are not all
+    PKRM expressions: on random truth tables it usually finds fewer cubes than the executable, but sometimes
+    one more.
+
+    Args:
+        truth_table (array-like): The 2^n values (0 or 1) of the function, truth_table[i] is the value for
+                                  the input i (variable k is the bit k of i).
+
+    Returns:
+        list: The cubes of the ESOP, each one as a tuple (pos, neg) with the variables that must be 1 and the
+              variables that must be 0. The cube ([], []) is the constant 1.
+    """
+    table = np.asarray(truth_table).astype(bool).reshape(-1)
+    number_of_vars = int(np.log2(len(table)))
+
+    if len(table) != 2**number_of_vars:
+        raise ValueError("Input truth_table must have a length that is a power of 2")
+
+    # Built from the top: the distinct cofactors of each level (one per row) and, for each one,
+    # the indices of its three children (f0, f1, f2) in the next level
+    rows = [table[np.newaxis, :]]
+    children : list[np.ndarray] = [np.zeros((1, 3), dtype=np.int64)]
+    for k in range(number_of_vars, 0, -1):
+        half = 2**(k - 1)
+        f0 , f1 = rows[-1][:, :half] , rows[-1][:, half:]
+        child_rows = np.concatenate([f0, f1, f0 ^ f1])
+
+        unique_child_rows , inverse = unique_rows(child_rows)
+        children.append(inverse.reshape(3, -1).T)
+        rows.append(unique_child_rows)
+
+    # Reverse so that rows[k] and children[k] are the cofactors of k variables
+    rows.reverse()
+    children = [children[0]] + children[:0:-1]
+
+    # Cost (number of cubes) of each cofactor, from the constants up
+    costs = [rows[0][:, 0].astype(np.int64)]
+    expansions = [np.zeros(len(rows[0]), dtype=np.int64)]
+    for k in range(1, number_of_vars + 1):
+        child_costs = costs[k - 1][children[k]]
+        # The cheapest expansion uses the two cheapest children, the most expensive one is dropped
+        expansions.append(EXPANSION_PREFERENCE[np.argmax(child_costs[:, EXPANSION_PREFERENCE], axis=1)])
+        costs.append(child_costs.sum(axis=1) - child_costs.max(axis=1))
+
+    # Build the cubes from the top, each cofactor with the literals of its expansions
+    esop : list[tuple[list[int], list[int]]] = []
+    stack : list[tuple[int, int, list[int], list[int]]] = [(number_of_vars, 0, [], [])]
+    while stack:
+        k , index , pos , neg = stack.pop()
+        if costs[k][index] == 0:
+            continue
+        if k == 0:
+            esop.append((pos, neg))
+            continue
+
+        var = k - 1
+        child_0 , child_1 , child_2 = children[k][index]
+        if expansions[k][index] == SHANNON:
+            stack.append((k - 1, child_1, pos + [var], neg))
+            stack.append((k - 1, child_0, pos, neg + [var]))
+        elif expansions[k][index] == POSITIVE_DAVIO:
+            stack.append((k - 1, child_2, pos + [var], neg))
+            stack.append((k - 1, child_0, pos, neg))
+        else:
+            stack.append((k - 1, child_2, pos, neg + [var]))
+            stack.append((k - 1, child_1, pos, neg))
+
+    return esop
+
+
+def unique_rows(rows : np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the distinct rows of a boolean matrix.
+
+    Args:
+        rows (numpy.ndarray): A 2D boolean array.
+
+    Returns:
+        tuple: The distinct rows and, for each row of the input, the index of its distinct row.
+    """
+    # Compare the rows as packed bytes
+    packed = np.ascontiguousarray(np.packbits(rows, axis=1))
+    keys = packed.view(np.dtype((np.void, packed.shape[1]))).reshape(-1)
+
+    _ , first_indices , inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return rows[first_indices] , inverse.reshape(-1)
+
+
+def evaluate_esop(esop : list[tuple[list[int], list[int]]] , number_of_vars : int ) -> np.ndarray:
+    """
+    Computes the truth table of an ESOP.
+
+    Args:
+        esop (list): The cubes of the ESOP, as returned by `minimize_esop`.
+        number_of_vars (int): The number of variables.
+
+    Returns:
+        numpy.ndarray: The 2^n boolean values of the ESOP.
+    """
+    inputs = np.arange(2**number_of_vars)
+    table = np.zeros(2**number_of_vars, dtype=bool)
+
+    for pos , neg in esop:
+        cube = np.ones(2**number_of_vars, dtype=bool)
+        for var in pos:
+            cube &= (inputs >> var) & 1 == 1
+        for var in neg:
+            cube &= (inputs >> var) & 1 == 0
+        table ^= cube
+
+    return table
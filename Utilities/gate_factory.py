@@ -0,0 +1,98 @@
+import numpy as np
+from functools import lru_cache
+from qiskit import QuantumCircuit
+from qiskit.circuit import Gate, Parameter, ParameterExpression
+from qiskit.circuit.library import RYGate, XGate, MCXGate, MCXVChain
+
+# Typing stuff
+from typing import Any, Union
+
+
+# Qiskit can only build a controlled RY gate with an unbound parameter for up to this number of controls
+MAX_PARAMETERIZED_RY_CONTROLS = 3
+
+
+def controlled_x(number_of_controls : int , control_state : Union[int, np.integer] ) -> Gate:
+    """
+    Gets the (multi-controlled) X gate with the given controls. The gates are memoized: the same object
+    (and so the same definition) is returned for the same controls, it must not be modified.
+
+    Args:
+        number_of_controls (int): The number of control qubits, the target is the last qubit of the gate. 0 is a X gate.
+        control_state (int): The state of the control qubits that enables the gate.
+
+    Returns:
+        Gate: The shared controlled X gate.
+    """
+    return _controlled_x(int(number_of_controls), int(control_state))
+
+
+def controlled_ry(angle : Any , number_of_controls : int , control_state : Union[int, np.integer] ) -> Gate:
+    """
+    Gets a (multi-controlled) RY gate with the given angle and controls. Its definition is bound from a
+    parameterized definition that is only built once for each number of controls and control state, so only the
+    angle is new for each gate (the gates are not memoized, the angles of real data are hardly ever repeated).
+
+    The angle may also be an unbound parameter, even with more controls than Qiskit supports: from 4 controls on,
+    the definition is the one Qiskit synthesizes for a numeric angle, a multi-controlled SU(2) gate
+    (arXiv:2302.06377), with its single-qubit gates written as RY(±θ/4).
+
+    Args:
+        angle (float or Parameter): The angle of the RY gate.
+        number_of_controls (int): The number of control qubits, the target is the last qubit of the gate. 0 is a RY gate.
+        control_state (int): The state of the control qubits that enables the gate.
+
+    Returns:
+        Gate: The controlled RY gate.
+    """
+    if not isinstance(angle, ParameterExpression):
+        angle = float(angle)
+    if number_of_controls == 0:
+        return RYGate(angle)
+
+    theta , definition = _parameterized_ry_definition(int(number_of_controls), int(control_state))
+
+    gate = Gate(f"c{number_of_controls}ry", number_of_controls + 1, [angle])
+    gate.definition = definition.assign_parameters({theta: angle})
+    return gate
+
+
+def clear_gate_cache() -> None:
+    """
+    Remove every memoized gate and definition.
+    """
+    _controlled_x.cache_clear()
+    _parameterized_ry_definition.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _controlled_x(number_of_controls : int , control_state : int ) -> Gate:
+    if number_of_controls == 0:
+        return XGate()
+    return MCXGate(number_of_controls, ctrl_state=control_state)
+
+
+@lru_cache(maxsize=None)
+def _parameterized_ry_definition(number_of_controls : int , control_state : int ) -> tuple[Parameter, QuantumCircuit]:
+    theta = Parameter("θ")
+    definition = QuantumCircuit(number_of_controls + 1)
+
+    if number_of_controls <= MAX_PARAMETERIZED_RY_CONTROLS:
+        definition.append(RYGate(theta).control(number_of_controls, ctrl_state=control_state), range(number_of_controls + 1))
+        return theta , definition
+
+    # The controls are split in two halves, each one with a multi-controlled X that borrows qubits of the other half
+    # as dirty ancillas. With S = RY(-θ/4) on the target, S† X S X S† X S X = RY(θ) when both halves are enabled
+    # and the identity otherwise
+    k_1 , k_2 = (number_of_controls + 1) // 2 , number_of_controls // 2
+    controls , target = list(range(number_of_controls)) , number_of_controls
+
+    mcx_1 = MCXVChain(k_1, dirty_ancillas=True, ctrl_state=control_state % 2**k_1)
+    mcx_2 = MCXVChain(k_2, dirty_ancillas=True, ctrl_state=control_state >> k_1)
+    for _ in range(2):
+        definition.append(mcx_1, controls[:k_1] + [target] + controls[k_1 : 2*k_1 - 2])
+        definition.ry(-theta / 4, target)
+        definition.append(mcx_2, controls[k_1:] + [target] + controls[k_1 - k_2 + 2 : k_1])
+        definition.ry(theta / 4, target)
+
+    return theta , definition
@@ -0,0 +1,81 @@
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import ParameterVector
+
+# Typing stuff
+from typing import Union
+
+
+def gray_code_angles(theta: Union[list, np.ndarray, ParameterVector]) -> np.ndarray:
+    """
+    Computes the angles of the Gray code decomposition of a uniformly controlled rotation.
+
+    The uniformly controlled rotation applies the rotation theta[p] to the target when the controls are in
+    the state p. It is decomposed to 2^k single qubit rotations, the i-th with the angle phi[i], each one
+    followed by a CNOT. The angles are found by solving the system:
+    theta[p] = sum_i (-1)^(p·g(i)) * phi[i] , where g(i) is the Gray code of i,
+    which is a (Gray code ordered) Walsh–Hadamard transform of theta.
+
+    Args:
+        theta (array-like): The 2^k angles of the uniformly controlled rotation (numbers or Parameters).
+
+    Returns:
+        numpy.ndarray: The 2^k angles phi of the single qubit rotations, in the order they are applied.
+    """
+    angles = np.array(theta)
+    size = len(angles)
+
+    if size & (size - 1) != 0:
+        raise ValueError("Input theta must have a length that is a power of 2")
+
+    # Fast Walsh–Hadamard transform
+    step = 1
+    while step < size:
+        angles = angles.reshape(-1, 2, step)
+        angles = np.concatenate([angles[:, 0, :] + angles[:, 1, :], angles[:, 0, :] - angles[:, 1, :]], axis=1)
+        step *= 2
+    angles = angles.reshape(-1)
+
+    # Reorder by the Gray codes
+    indices = np.arange(size)
+    phi : np.ndarray = angles[indices ^ (indices >> 1)] / size
+
+    return phi
+
+
+def uniformly_controlled_ry(QCircuit: QuantumCircuit, theta: Union[list, np.ndarray, ParameterVector], control_qubits: list[int], target_qubit: int) -> QuantumCircuit:
+    """
+    Appends a uniformly controlled RY rotation (multiplexor), using 2^k RY gates and 2^k CNOTs for k controls.
+
+    Args:
+        QCircuit (QuantumCircuit): The quantum circuit to which the rotation is applied.
+        theta (array-like): The 2^k angles, theta[p] is applied when the control qubits are in the state p
+                            (control_qubits[0] is the least significant bit of p).
+        control_qubits (list): The list of the k control qubits.
+        target_qubit (int): The target qubit.
+
+    Returns:
+        QuantumCircuit: The modified quantum circuit.
+    """
+    number_of_controls = len(control_qubits)
+
+    if len(theta) != 2**number_of_controls:
+        raise ValueError("Input theta must have one angle for each state of the control qubits")
+
+    if number_of_controls == 0:
+        QCircuit.ry(theta[0], target_qubit)
+        return QCircuit
+
+    phi = gray_code_angles(theta)
+
+    for i in range(2**number_of_controls):
+        QCircuit.ry(phi[i], target_qubit)
+
+        # The control is the bit that changes between the Gray codes of i and i+1 (the last one wraps around to 0)
+        if i == 2**number_of_controls - 1:
+            changed_bit = number_of_controls - 1
+        else:
+            changed_bit = ((i + 1) & -(i + 1)).bit_length() - 1
+        QCircuit.cx(control_qubits[changed_bit], target_qubit)
+
+    return QCircuit
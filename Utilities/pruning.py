@@ -0,0 +1,89 @@
+from numpy import pi
+from qiskit import QuantumCircuit
+from qiskit.circuit import ParameterExpression
+from Utilities.gate_factory import controlled_x, controlled_ry
+
+# Typing stuff
+from typing import Any, Optional
+
+
+# Angles closer than this to a multiple of π are treated as exact multiples of π
+PRUNE_TOLERANCE = 1e-10
+
+
+def ry_multiple_of_pi(angle : Any , tolerance : Optional[float] = PRUNE_TOLERANCE ) -> Optional[int]:
+    """
+    Checks if an RY angle is a multiple of π, modulo the 4π period of the RY gate.
+
+    Args:
+        angle (float or Parameter): The angle of the RY gate.
+        tolerance (float, optional): The absolute tolerance of the check. None disables it.
+
+    Returns:
+        int or None: k in {0, 1, 2, 3} if the angle is kπ (mod 4π), otherwise (or for parameters) None.
+                     RY(0) is the identity, RY(2π) is -I, RY(π) maps |0> to |1> and RY(3π) maps |1> to |0>.
+    """
+    if tolerance is None or isinstance(angle, ParameterExpression):
+        return None
+
+    multiple = float(angle) / pi
+    nearest = round(multiple)
+    if abs(multiple - nearest) * pi > tolerance:
+        return None
+
+    return int(nearest % 4)
+
+
+def record_pruning(QCircuit : QuantumCircuit , removed : int = 0 , simplified : int = 0 ) -> None:
+    """
+    Adds to the number of removed and simplified gates reported in the metadata of the circuit,
+    under the keys "pruned_gates" and "simplified_gates".
+
+    Args:
+        QCircuit (QuantumCircuit): The quantum circuit.
+        removed (int, optional): The number of gates that were not appended. Defaults to 0.
+        simplified (int, optional): The number of rotations that were replaced by X gates. Defaults to 0.
+    """
+    metadata = QCircuit.metadata
+    metadata["pruned_gates"] = metadata.get("pruned_gates", 0) + removed
+    metadata["simplified_gates"] = metadata.get("simplified_gates", 0) + simplified
+
+
+def append_pruned_ry(QCircuit : QuantumCircuit , angle : Any , control_qubits : list[int] , control_state : int ,
+                     target_qubit : int , tolerance : Optional[float] = PRUNE_TOLERANCE , target_state : Optional[int] = None ) -> Optional[int]:
+    """
+    Appends a (multi-controlled) RY gate, unless its angle makes it trivial:
+    RY(0) is skipped, an uncontrolled RY(2π) becomes a global phase, and an RY that flips a target
+    known to be in a basis state becomes a (multi-controlled) X gate.
+
+    Args:
+        QCircuit (QuantumCircuit): The quantum circuit to which the gate is appended.
+        angle (float or Parameter): The angle of the RY gate.
+        control_qubits (list): The control qubits.
+        control_state (int): The state of the control qubits that enables the gate.
+        target_qubit (int): The target qubit.
+        tolerance (float, optional): The tolerance of the angle checks. None always appends the RY gate.
+        target_state (int, optional): The basis state (0 or 1) of the target when the controls are enabled, if known.
+
+    Returns:
+        int or None: The multiple of π of the angle, as returned by ry_multiple_of_pi.
+    """
+    multiple = ry_multiple_of_pi(angle, tolerance)
+
+    if multiple == 0:
+        record_pruning(QCircuit, removed=1)
+    elif multiple == 2 and len(control_qubits) == 0:
+        QCircuit.global_phase += pi
+        record_pruning(QCircuit, removed=1)
+    elif target_state is not None and multiple == (1 if target_state == 0 else 3):
+        if len(control_qubits) == 0:
+            QCircuit.x(target_qubit)
+        else:
+            QCircuit.append(controlled_x(len(control_qubits), control_state), control_qubits + [target_qubit])
+        record_pruning(QCircuit, simplified=1)
+    elif len(control_qubits) == 0:
+        QCircuit.ry(angle, target_qubit)
+    else:
+        QCircuit.append(controlled_ry(angle, len(control_qubits), control_state), control_qubits + [target_qubit])
+
+    return multiple
@@ -0,0 +1,115 @@
+import os
+import hashlib
+from collections import OrderedDict
+
+from qiskit import QuantumCircuit
+
+# Typing stuff
+from typing import Callable, Hashable, Optional
+
+
+class TranspileCache:
+    """
+    Least recently used (LRU) cache of transpiled circuits, optionally persisted to disk as QPY files.
+
+    It is meant to store parameterized templates, whose gate layout only depends on the size of the data,
+    so that later encodings of the same size only have to bind their parameters.
+
+    Args:
+        max_size (int, optional): The maximum number of circuits kept in memory. Defaults to 128.
+        cache_dir (str, optional): A directory where the transpiled circuits are also stored as QPY files,
+                                   so that they can be reused across processes. Defaults to None (memory only).
+    """
+
+    def __init__(self, max_size: int = 128, cache_dir: Optional[str] = None) -> None:
+        if max_size < 1:
+            raise ValueError("Input max_size must be at least 1")
+
+        self.max_size = max_size
+        self.cache_dir : Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._circuits : OrderedDict[Hashable, QuantumCircuit] = OrderedDict()
+
+        self.set_cache_dir(cache_dir)
+
+    def get(self, key: Hashable, build: Callable[[], QuantumCircuit]) -> QuantumCircuit:
+        """
+        Get the transpiled circuit stored under the key, building (and storing) it if it is missing.
+
+        Args:
+            key (hashable): The key of the circuit, its repr must be stable across processes when cache_dir is used.
+            build (callable): A function without arguments that returns the transpiled circuit.
+
+        Returns:
+            QuantumCircuit: The cached transpiled circuit. It is shared, use `assign_parameters` to get a new one.
+        """
+        if key in self._circuits:
+            self.hits += 1
+            self._circuits.move_to_end(key)
+            return self._circuits[key]
+
+        circuit : Optional[QuantumCircuit] = self._load(key)
+        if circuit is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            circuit = build()
+            self._store(key, circuit)
+
+        self._circuits[key] = circuit
+        if len(self._circuits) > self.max_size:
+            # Remove the least recently used circuit
+            self._circuits.popitem(last=False)
+
+        return circuit
+
+    def set_cache_dir(self, cache_dir: Optional[str]) -> None:
+        """
+        Set the directory where the transpiled circuits are also stored as QPY files, the circuits in memory are kept.
+
+        Args:
+            cache_dir (str): The directory, created if it does not exist. None to only keep the circuits in memory.
+        """
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def clear(self) -> None:
+        """
+        Remove every circuit kept in memory and reset the statistics (the QPY files are kept).
+        """
+        self._circuits.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._circuits)
+
+    def _path(self, key: Hashable) -> str:
+        assert self.cache_dir is not None
+        file_name = hashlib.sha256(repr(key).encode()).hexdigest() + ".qpy"
+        return os.path.join(self.cache_dir, file_name)
+
+    def _load(self, key: Hashable) -> Optional[QuantumCircuit]:
+        if self.cache_dir is None or not os.path.exists(self._path(key)):
+            return None
+
+        from qiskit import qpy
+
+        with open(self._path(key), "rb") as file:
+            circuit : QuantumCircuit = qpy.load(file)[0]
+        return circuit
+
+    def _store(self, key: Hashable, circuit: QuantumCircuit) -> None:
+        if self.cache_dir is None:
+            return
+
+        from qiskit import qpy
+
+        # Write to a temporary file first so that other processes never read a partial file
+        path = self._path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            qpy.dump(circuit, file)
+        os.replace(temporary_path, path)